@@ -1,5 +1,8 @@
 from fastapi import APIRouter
-import requests
+import httpx
+from database import pg_pool
+from dependencies import JobQueueDep, ExtractionCacheDep, OcrServiceClientDep
+import asyncio
 
 health_router = APIRouter(tags=["health"])
 
@@ -7,17 +10,31 @@ health_router = APIRouter(tags=["health"])
 async def health_check():
     return {"status": "healthy"}
 
+@health_router.get("/health/db-pool")
+async def db_pool_health():
+    return pg_pool.metrics()
+
+@health_router.get("/health/jobs")
+async def jobs_health(jobs: JobQueueDep):
+    return await asyncio.to_thread(jobs.counts)
+
+@health_router.get("/health/llm-cache")
+async def llm_cache_health(cache: ExtractionCacheDep):
+    return await asyncio.to_thread(cache.stats)
+
 @health_router.get("/ping")
 async def ping():
     print("Ping received")
     return {"status": "ok"}
 
 @health_router.get("/microservice")
-def micro_health():
-    url = "http://0.0.0.0:8001/"
-    response = requests.get(url)
-    data = response.json()
-    if data["status"] == "healthy":
+async def micro_health(client: OcrServiceClientDep):
+    try:
+        response = await client.get("/", timeout=5.0)
+        data = response.json()
+    except (httpx.HTTPError, ValueError):
+        return {"status": "not healthy"}
+    if isinstance(data, dict) and data.get("status") == "healthy":
         return {"status": "healthy"}
-    else:
-        return {"status": "not healthy"}
\ No newline at end of file
+    # reachable, but not reporting itself healthy
+    return {"status": "degraded"}
\ No newline at end of file
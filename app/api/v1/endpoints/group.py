@@ -39,13 +39,11 @@ async def delete_ug(
 @router.post("/upload-image")
 async def upload_image(
     image: UploadFile, 
-    service: GroupServiceDep,
-    background_tasks: BackgroundTasks
+    service: GroupServiceDep
 ):
-    png = await service.standardize(image)
     filepath = service.create_group_filepath()
     
-    background_tasks.add_task(service.save_image, png, filepath)
+    await service.save_image(image, filepath)
 
     return { 'filepath': filepath }
 
@@ -1,8 +1,19 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from fastapi.responses import FileResponse
+from email.utils import formatdate
+from typing import Annotated
+from dependencies import ThumbnailCacheDep, HotImageCacheDep
+from image_cache import CachedImage
+from imaging import read_file
+from config import get_settings
+import asyncio
+import hashlib
+import mimetypes
 import os
 
 
+settings = get_settings()
+
 router = APIRouter(
     prefix="/images",
     tags=["images"]
@@ -10,29 +21,105 @@ router = APIRouter(
 
 UPLOADS_DIR = "../storage"
 
+Dimension = Annotated[int | None, Query(gt=0, le=settings.THUMBNAIL_MAX_SIZE)]
+
+# stored names are UUIDs that are never overwritten, so a URL's bytes never change
+CACHE_CONTROL = {
+    "pfp": "public, max-age=31536000, immutable",
+    "groups": "public, max-age=31536000, immutable",
+    "receipts": "private, max-age=31536000, immutable",
+}
+
+
+def cache_headers(bucket: str, stat: os.stat_result, w, h) -> dict:
+    etag_base = f"{stat.st_mtime_ns}-{stat.st_size}-{w}x{h}"
+    return {
+        "ETag": f'"{hashlib.md5(etag_base.encode(), usedforsecurity=False).hexdigest()}"',
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Cache-Control": CACHE_CONTROL[bucket],
+    }
+
+
+def is_not_modified(request: Request, headers: dict) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or headers["ETag"] in tags
+    # If-Modified-Since only counts when no If-None-Match was sent
+    return request.headers.get("if-modified-since") == headers["Last-Modified"]
+
+
+async def serve_image(request: Request, bucket: str, image_name: str, w, h, thumbnails, cache, not_found: str):
+    image_path = os.path.join(UPLOADS_DIR, bucket, image_name)
+    try:
+        stat = os.stat(image_path)
+    except FileNotFoundError:
+        cache.invalidate(bucket, image_name)
+        raise HTTPException(status_code=404, detail=not_found)
+
+    cached = cache.get(bucket, image_name, w, h, stat.st_mtime_ns)
+    if cached is not None:
+        if is_not_modified(request, cached.headers):
+            return Response(status_code=304, headers=cached.headers)
+        return Response(cached.body, media_type=cached.media_type, headers=cached.headers)
+
+    headers = cache_headers(bucket, stat, w, h)
+    if is_not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+
+    if w or h:
+        # variants are sent from memory: the file can be evicted by another worker at any time
+        image_path, body = await thumbnails.read(image_path, w, h)
+    elif stat.st_size <= cache.max_item_bytes:
+        body = await asyncio.to_thread(read_file, image_path)
+    else:
+        return FileResponse(image_path, headers=headers, stat_result=stat)
+
+    media_type = mimetypes.guess_type(image_path)[0] or "application/octet-stream"
+    if len(body) <= cache.max_item_bytes:
+        cache.put(bucket, image_name, w, h, CachedImage(body, media_type, headers, stat.st_mtime_ns))
+    return Response(body, media_type=media_type, headers=headers)
+
+
 @router.get("/")
 def hello():
     return { "message": "hello from images"}
 
+@router.get("/stats")
+async def cache_stats(cache: HotImageCacheDep):
+    return cache.stats()
+
 @router.get("/pfp/{image_name}")
-async def get_profile_picture(image_name: str):
-    image_path = os.path.join(UPLOADS_DIR, "pfp", image_name)
-    if not os.path.exists(image_path):
-        raise HTTPException(status_code=404, detail="Profile picture not found")
-    return FileResponse(image_path)
+async def get_profile_picture(
+    request: Request,
+    image_name: str,
+    thumbnails: ThumbnailCacheDep,
+    cache: HotImageCacheDep,
+    w: Dimension = None,
+    h: Dimension = None
+):
+    return await serve_image(request, "pfp", image_name, w, h, thumbnails, cache, "Profile picture not found")
 
 
 @router.get("/groups/{image_name}")
-async def get_group_picture(image_name: str):
-    image_path = os.path.join(UPLOADS_DIR, "groups", image_name)
-    if not os.path.exists(image_path):
-        raise HTTPException(status_code=404, detail="Group picture not found")
-    return FileResponse(image_path)
+async def get_group_picture(
+    request: Request,
+    image_name: str,
+    thumbnails: ThumbnailCacheDep,
+    cache: HotImageCacheDep,
+    w: Dimension = None,
+    h: Dimension = None
+):
+    return await serve_image(request, "groups", image_name, w, h, thumbnails, cache, "Group picture not found")
 
 
 @router.get("/receipts/{image_name}")
-async def get_receipt_image(image_name: str):
-    image_path = os.path.join(UPLOADS_DIR, "receipts", image_name)
-    if not os.path.exists(image_path):
-        raise HTTPException(status_code=404, detail="Receipt image not found")
-    return FileResponse(image_path)
+async def get_receipt_image(
+    request: Request,
+    image_name: str,
+    thumbnails: ThumbnailCacheDep,
+    cache: HotImageCacheDep,
+    w: Dimension = None,
+    h: Dimension = None
+):
+    return await serve_image(request, "receipts", image_name, w, h, thumbnails, cache, "Receipt image not found")
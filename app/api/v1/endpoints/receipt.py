@@ -1,10 +1,16 @@
-from fastapi import APIRouter, HTTPException, UploadFile, Form, BackgroundTasks
-from dependencies import ReceiptProcessorDep, ReceiptRepositoryDep, SplitServiceDep, SplitRepositoryDep
+import asyncio
+from fastapi import APIRouter, HTTPException, UploadFile, Form, WebSocket, WebSocketDisconnect, status
+from dependencies import ReceiptProcessorDep, ReceiptRepositoryDep, SplitServiceDep, SplitRepositoryDep, ReceiptEventBusDep
 from pydantic import ValidationError
 from schemas import ProcessedReceipt
 from typing import Annotated
+from config import get_settings
 
 
+settings = get_settings()
+
+FINAL_STATUSES = {"completed", "failed"}
+
 router = APIRouter(
     prefix="/receipts",
     tags=["receipts"]
@@ -15,22 +21,30 @@ router = APIRouter(
 async def create_receipt(
     user_id: Annotated[int, Form()],
     image: UploadFile,
-    service: ReceiptProcessorDep,
-    background_tasks: BackgroundTasks
+    service: ReceiptProcessorDep
 ):
-    png = await service.standardize(image)
-
     filepath = service.create_filepath(user_id)
 
+    fingerprint = await service.save_image(image, filepath)
+
     receipt_data = {
         "user_id": user_id,
         "filepath": filepath,
         "status": "pending"
     }
-    
-    background_tasks.add_task(service.save_and_process, png, filepath)
 
-    return await service.upload(receipt_data)
+    # a re-upload of the same photo reuses its items; look-alikes are checked after OCR
+    duplicate, similar = await service.find_duplicate(user_id, fingerprint)
+    if duplicate is not None:
+        receipt_data["status"] = "completed"
+        receipt_data["processed_data"] = duplicate["processed_data"]
+
+    # insert first so the job always finds its row
+    receipt = await service.upload(receipt_data)
+    if duplicate is None:
+        await service.start_processing(receipt["receipt_id"], filepath, similar)
+    await service.add_to_index(receipt, fingerprint)
+    return receipt
 
 
 @router.get("/{receipt_id}")
@@ -39,6 +53,46 @@ async def get_receipt(receipt_id: int, repo: ReceiptRepositoryDep):
     print(receipt) 
     return receipt
 
+@router.websocket("/{receipt_id}/events")
+async def receipt_events(
+    websocket: WebSocket,
+    receipt_id: int,
+    repo: ReceiptRepositoryDep,
+    events: ReceiptEventBusDep
+):
+    await websocket.accept()
+    # subscribe before the first read so a status flip in between is not lost
+    queue = events.subscribe(receipt_id)
+    try:
+        try:
+            receipt = await repo.get(receipt_id)
+        except HTTPException:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Receipt not found")
+            return
+
+        await websocket.send_json(receipt)
+
+        while receipt["status"] not in FINAL_STATUSES:
+            try:
+                receipt = await asyncio.wait_for(
+                    queue.get(),
+                    timeout=settings.RECEIPT_EVENTS_RECHECK_SECONDS
+                )
+            except asyncio.TimeoutError:
+                # status may have been written by another worker
+                latest = await repo.get(receipt_id)
+                if latest["status"] == receipt["status"]:
+                    continue
+                receipt = latest
+            await websocket.send_json(receipt)
+
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        events.unsubscribe(receipt_id, queue)
+
+
 @router.post("/venmo")
 async def process_venmo(receipt: ProcessedReceipt, service: SplitServiceDep):
     try:
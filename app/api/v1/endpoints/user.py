@@ -112,11 +112,10 @@ async def upload_pfp(
     background_tasks: BackgroundTasks,
     repo: UserRepositoryDep
 ):
-    png = await service.standardize(image)
     filepath = service.create_pfp_filepath()
     user_update = UserUpdate(imageUri=filepath)
 
-    background_tasks.add_task(service.save_image, png, filepath)
+    await service.save_image(image, filepath)
     background_tasks.add_task(repo.update, user_id, user_update)
 
     return { 'filepath': filepath }
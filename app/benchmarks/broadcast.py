@@ -0,0 +1,251 @@
+"""
+Delivery latency of user-count broadcasts to real websocket clients on
+localhost, comparing the old sequential send loop with the Broadcaster.
+A uvicorn server runs in its own process and the clients connect to it
+with the websockets library, --connect-concurrency at a time and without
+compression. A --slow fraction of them stop reading. Their receive
+buffers are cut to --rcvbuf, and the server's socket send buffers to
+--sndbuf and its per-connection write buffer to --write-limit, so after a
+few messages a send to a slow client blocks the way it does for a stalled
+phone on a real network; the old loop only gets past it once uvicorn's
+keepalive ping times the client out. Each message carries the time it was
+published. The p50 and p99 are taken over every (reading client, message)
+delivery. A reading client that has not got the last message after
+--give-up seconds is stalled and each message it is missing counts as
+never delivered. Messages the coalesce policy replaced before they were
+sent are counted separately.
+
+    python benchmarks/broadcast.py --clients 10000 --slow 0.01 --messages 6 --message-bytes 8192 --interval 5
+"""
+import argparse
+import asyncio
+import base64
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import websockets
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+
+from broadcaster import Broadcaster, COALESCE, DROP_SLOWEST
+
+
+SEQUENTIAL = "sequential"
+
+
+def raise_fd_limit():
+    # one descriptor per connection on each side
+    _, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def server_app(mode, args):
+    app = FastAPI()
+    clients = set()
+    tasks = set()
+    hub = None if mode == SEQUENTIAL else Broadcaster(
+        queue_size=args.queue_size, policy=mode, send_timeout=args.send_timeout
+    )
+
+    async def old_loop(message):
+        # what the endpoint did before: one await per client, in turn
+        for websocket in list(clients):
+            try:
+                await websocket.send_text(message)
+            except Exception:
+                clients.discard(websocket)
+
+    @app.websocket("/ws")
+    async def ws(websocket: WebSocket):
+        await websocket.accept()
+        if hub is None:
+            clients.add(websocket)
+        else:
+            hub.connect(websocket)
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            clients.discard(websocket)
+            if hub is not None:
+                hub.disconnect(websocket)
+
+    async def publish_all(count, size, interval):
+        for i in range(count):
+            header = f"{i:08d} {time.time():.6f} "
+            # random padding, so the size holds even for a client that negotiates permessage-deflate
+            message = header + base64.b64encode(os.urandom(size)).decode()[:max(0, size - len(header))]
+            if hub is None:
+                await old_loop(message)
+            else:
+                hub.publish(message)
+            await asyncio.sleep(interval)
+
+    @app.get("/clients")
+    async def connected():
+        return {"count": len(clients) if hub is None else len(hub)}
+
+    @app.post("/publish")
+    async def publish(count: int, size: int, interval: float):
+        task = asyncio.create_task(publish_all(count, size, interval))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        return {}
+
+    return app
+
+
+def serve(args):
+    import uvicorn
+    from uvicorn.protocols.websockets.websockets_impl import WebSocketProtocol
+
+    class SmallBuffers(WebSocketProtocol):
+        def __init__(self, *a, **kw):
+            super().__init__(*a, **kw)
+            self.write_limit = args.write_limit  # applied to the transport in connection_made
+
+    raise_fd_limit()
+    # accepted connections inherit the listening socket's send buffer size
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, args.sndbuf)
+    sock.bind(("127.0.0.1", args.port))
+    sock.listen(4096)
+    config = uvicorn.Config(server_app(args.serve, args), ws=SmallBuffers, log_level="warning")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+async def wait_for_clients(client, count):
+    for _ in range(600):
+        try:
+            response = await client.get("/clients")
+            if response.json()["count"] >= count:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("clients did not connect")
+
+
+async def connect(port, slow, rcvbuf):
+    uri = f"ws://127.0.0.1:{port}/ws"
+    if not slow:
+        return await websockets.connect(uri, max_queue=None, max_size=None, ping_interval=None, compression=None)
+    # a slow client has a small receive buffer and stops reading once one frame is queued
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+    sock.setblocking(False)
+    await asyncio.get_running_loop().sock_connect(sock, ("127.0.0.1", port))
+    return await websockets.connect(
+        uri, sock=sock, max_queue=1, max_size=None, ping_interval=None, compression=None
+    )
+
+
+async def reader(websocket, latencies, last):
+    async for message in websocket:
+        latencies.append(time.time() - float(message[9:26]))
+        if message.startswith(last):
+            return
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def describe(seconds):
+    return "stalled" if seconds == float("inf") else f"{seconds * 1000:8.1f} ms"
+
+
+async def measure(mode, args):
+    server = subprocess.Popen([
+        sys.executable, os.path.abspath(__file__), "--serve", mode, "--port", str(args.port),
+        "--queue-size", str(args.queue_size), "--send-timeout", str(args.send_timeout),
+        "--sndbuf", str(args.sndbuf), "--write-limit", str(args.write_limit)
+    ])
+    url = f"http://127.0.0.1:{args.port}"
+    sockets = []
+    try:
+        async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+            await wait_for_clients(client, 0)
+
+            slow = [random.random() < args.slow for _ in range(args.clients)]
+            semaphore = asyncio.Semaphore(args.connect_concurrency)
+
+            async def one(is_slow):
+                async with semaphore:
+                    sockets.append((await connect(args.port, is_slow, args.rcvbuf), is_slow))
+
+            start = time.perf_counter()
+            await asyncio.gather(*[one(is_slow) for is_slow in slow])
+            await wait_for_clients(client, args.clients)
+            connect_time = time.perf_counter() - start
+
+            last = f"{args.messages - 1:08d}"
+            reading = [websocket for websocket, is_slow in sockets if not is_slow]
+            received = [[] for _ in reading]
+            readers = [
+                asyncio.create_task(reader(websocket, got, last))
+                for websocket, got in zip(reading, received)
+            ]
+            await client.post("/publish", params={
+                "count": args.messages, "size": args.message_bytes, "interval": args.interval
+            })
+            await asyncio.wait(readers, timeout=args.give_up)
+
+        latencies, stalled, coalesced = [], 0, 0
+        for task, got in zip(readers, received):
+            latencies += got
+            if task.done():
+                coalesced += args.messages - len(got)
+            else:
+                task.cancel()
+                stalled += 1
+                latencies += [float("inf")] * (args.messages - len(got))
+        latencies.sort()
+        print(f"{mode:<14} p50 {describe(percentile(latencies, 0.5))}   p99 {describe(percentile(latencies, 0.99))}   "
+              f"stalled clients {stalled}/{len(readers)}   coalesced {coalesced}   "
+              f"({len(sockets)} clients connected in {connect_time:.1f}s)")
+    finally:
+        for websocket, _ in sockets:
+            websocket.transport.abort()
+        server.terminate()
+        server.wait()
+
+
+async def main(args):
+    raise_fd_limit()
+    print(f"{args.clients} clients, {args.slow:.0%} slow, {args.messages} messages of {args.message_bytes} bytes")
+    for mode in (SEQUENTIAL, COALESCE, DROP_SLOWEST):
+        await measure(mode, args)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--clients", type=int, default=10000)
+    ap.add_argument("--slow", type=float, default=0.01, help="fraction of clients that stop reading")
+    ap.add_argument("--messages", type=int, default=6)
+    ap.add_argument("--message-bytes", type=int, default=8192)
+    ap.add_argument("--interval", type=float, default=5.0, help="seconds between messages")
+    ap.add_argument("--queue-size", type=int, default=8)
+    ap.add_argument("--send-timeout", type=float, default=5.0)
+    ap.add_argument("--sndbuf", type=int, default=4096, help="server SO_SNDBUF per connection")
+    ap.add_argument("--write-limit", type=int, default=4096, help="server write buffer high-water mark")
+    ap.add_argument("--rcvbuf", type=int, default=4096, help="slow client SO_RCVBUF")
+    ap.add_argument("--connect-concurrency", type=int, default=200)
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--give-up", type=float, default=120.0)
+    ap.add_argument("--serve", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.serve:
+        serve(args)
+    else:
+        asyncio.run(main(args))
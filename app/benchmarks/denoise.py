@@ -0,0 +1,62 @@
+"""
+Compares the OCR denoisers (ocr_engine.DENOISERS) on the photographed
+receipts in receipt_corpus.json: median wall time of the denoise stage and,
+with tesseract installed, how the recognized text scores against the
+labeled transcription, items and totals, per image and over the corpus.
+
+    python benchmarks/denoise.py --rounds 3
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+import ocr_engine
+from benchmarks.ocr import tesseract_available
+from benchmarks.parser import labeled_images, ocr_accuracy, summarize
+
+
+def main(args):
+    with_tesseract = tesseract_available()
+    if not with_tesseract:
+        print("tesseract not available, reporting denoise time only")
+
+    scores = {denoiser: [] for denoiser in ocr_engine.DENOISERS}
+    for entry in labeled_images():
+        path = os.path.join(APP_DIR, entry["image"])
+        try:
+            image = ocr_engine.clahe(ocr_engine.resize(ocr_engine.load(path)))
+        except FileNotFoundError:
+            print(f"{entry['image']}: skipped, OpenCV cannot decode it")
+            continue
+
+        print(f"{entry['image']} ({image.shape[1]}x{image.shape[0]}):")
+        for denoiser, fn in ocr_engine.DENOISERS.items():
+            times = []
+            for _ in range(args.rounds):
+                start = time.perf_counter()
+                denoised = fn(image)
+                times.append(time.perf_counter() - start)
+
+            line = f"  {denoiser:<13} {statistics.median(times) * 1000:9.1f} ms"
+            if with_tesseract:
+                text = ocr_engine.clean_text(ocr_engine.tesseract(ocr_engine.threshold(denoised)))
+                scores[denoiser].append(ocr_accuracy(text, entry))
+                line += f"   {summarize(scores[denoiser][-1:])}"
+            print(line)
+
+    if with_tesseract:
+        print("corpus:")
+        for denoiser, denoiser_scores in scores.items():
+            if denoiser_scores:
+                print(f"  {denoiser:<13} {summarize(denoiser_scores)}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rounds", type=int, default=3)
+    main(ap.parse_args())
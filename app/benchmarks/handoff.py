@@ -0,0 +1,103 @@
+"""
+Latency of the receipt hand-off to the OCR service (POST /gpt) against a
+local stand-in, comparing the old requests.post in a worker thread (new
+TCP connection every call) with the shared keep-alive httpx client.
+
+Only the job worker hands off, so concurrency is bounded by JOB_CONCURRENCY.
+
+    python benchmarks/handoff.py --requests 1000 --concurrency 4 --max-connections 10
+"""
+import argparse
+import asyncio
+import multiprocessing
+import statistics
+import time
+import httpx
+import requests
+from aiohttp import web
+
+
+async def start_stub(port):
+    async def gpt(request):
+        await request.json()
+        return web.json_response({"status": "queued"})
+
+    app = web.Application()
+    app.router.add_post("/gpt", gpt)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+def blocking_handoff(url, receipt_id):
+    # what ReceiptProcessor.process did before
+    response = requests.post(f"{url}/gpt", json={"receipt_id": receipt_id, "path": "x.jpg"}, timeout=120)
+    response.raise_for_status()
+
+
+async def old_handoff(url, receipt_id):
+    await asyncio.to_thread(blocking_handoff, url, receipt_id)
+
+
+async def run(handoff, requests_count, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(receipt_id):
+        async with semaphore:
+            start = time.perf_counter()
+            await handoff(receipt_id)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(requests_count)])
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return (
+        statistics.median(latencies) * 1000,
+        latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        requests_count / elapsed
+    )
+
+
+def serve(port, ready):
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(start_stub(port))
+    ready.set()
+    loop.run_forever()
+
+
+async def main(args):
+    # the stand-in gets its own process so it does not share a GIL with the clients
+    ready = multiprocessing.Event()
+    stub = multiprocessing.Process(target=serve, args=(args.port, ready), daemon=True)
+    stub.start()
+    ready.wait()
+    url = f"http://127.0.0.1:{args.port}"
+
+    client = httpx.AsyncClient(
+        base_url=url,
+        limits=httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections),
+        transport=httpx.AsyncHTTPTransport(retries=2)
+    )
+
+    async def pooled_handoff(receipt_id):
+        response = await client.post("/gpt", json={"receipt_id": receipt_id, "path": "x.jpg"})
+        response.raise_for_status()
+
+    print(f"{args.requests} hand-offs, concurrency {args.concurrency}, {args.max_connections} pooled connections")
+    for name, handoff in [("requests.post", lambda i: old_handoff(url, i)), ("pooled httpx", pooled_handoff)]:
+        median, p99, rate = await run(handoff, args.requests, args.concurrency)
+        print(f"  {name:<14} median {median:6.2f} ms   p99 {p99:6.2f} ms   {rate:7.1f} req/s")
+    await client.aclose()
+    stub.terminate()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=500)
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--max-connections", type=int, default=10, help="OCR_SERVICE_MAX_CONNECTIONS")
+    ap.add_argument("--port", type=int, default=8765)
+    asyncio.run(main(ap.parse_args()))
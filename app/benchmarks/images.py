@@ -0,0 +1,194 @@
+"""
+Uploads/sec for image normalization on the sample images, comparing the old
+per-service standardize (EXIF tag scan, rotate, PNG) on the event loop with
+imaging.encode in a process pool, plus a per-upload memory/CPU profile of the
+old decode -> PNG -> decode -> save path against imaging.ingest, and a
+size/latency comparison of the storage codecs. With tesseract installed
+each codec is also scored on the photographed receipts in
+receipt_corpus.json: the stored image goes through ocr_engine.recognize and
+the text is compared with the labeled transcription, items and totals.
+RECEIPT_IMAGE_FORMAT should follow that table.
+
+    python benchmarks/images.py --rounds 5 --workers 4
+"""
+import argparse
+import asyncio
+import glob
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from PIL import Image, ExifTags
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+import ocr_engine
+from imaging import PROFILES, ImageProfile, encode, ingest
+from benchmarks.ocr import tesseract_available
+from benchmarks.parser import labeled_images, ocr_accuracy, summarize
+
+
+def sample_images():
+    paths = sorted(glob.glob(os.path.join(APP_DIR, "images", "*")))
+    paths += [os.path.join(APP_DIR, "receipt.jpg"), os.path.join(APP_DIR, "trader.jpg")]
+    samples = {}
+    for path in paths:
+        with open(path, "rb") as f:
+            content = f.read()
+        try:
+            Image.open(BytesIO(content)).verify()
+        except Exception:
+            print(f"skipping {os.path.basename(path)}: Pillow cannot decode it here")
+            continue
+        samples[os.path.basename(path)] = content
+    return samples
+
+
+def legacy_standardize(content):
+    image = Image.open(BytesIO(content))
+    try:
+        for orientation in ExifTags.TAGS.keys():
+            if ExifTags.TAGS[orientation] == 'Orientation':
+                break
+        exif = image._getexif()
+        if exif is not None and orientation in exif:
+            if exif[orientation] == 3:
+                image = image.rotate(180, expand=True)
+            elif exif[orientation] == 6:
+                image = image.rotate(270, expand=True)
+            elif exif[orientation] == 8:
+                image = image.rotate(90, expand=True)
+    except (AttributeError, KeyError, IndexError, TypeError):
+        pass
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    output_buffer = BytesIO()
+    image.save(output_buffer, format='PNG')
+    return output_buffer.getvalue()
+
+
+def legacy_save(content, path):
+    png = legacy_standardize(content)
+    img = Image.open(BytesIO(png))
+    img.save(path)
+
+
+def normalize(content, profile):
+    return encode(content, profile).getvalue()
+
+
+def measure(save, args, results):
+    # runs in a fresh process so ru_maxrss covers only this one upload
+    cpu = time.process_time()
+    save(*args)
+    results.put((time.process_time() - cpu, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+
+
+def profile_save(name, save, *args):
+    baseline = multiprocessing.Queue()
+    process = multiprocessing.Process(target=measure, args=(lambda: None, (), baseline))
+    process.start()
+    _, base_rss = baseline.get()
+    process.join()
+
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=measure, args=(save, args, results))
+    process.start()
+    cpu, rss = results.get()
+    process.join()
+    print(f"  {name:<8} cpu {cpu * 1000:8.1f} ms   peak rss +{(rss - base_rss) / 1024:7.1f} MiB")
+
+
+CODECS = {
+    "png": ImageProfile(max_size=None, format="PNG"),
+    "jpeg q90": ImageProfile(max_size=None, format="JPEG", quality=90),
+    "jpeg q75": ImageProfile(max_size=None, format="JPEG", quality=75),
+    "webp q80": ImageProfile(max_size=None, format="WEBP", quality=80),
+}
+
+
+def compare_codecs(samples):
+    for name, content in samples.items():
+        print(f"{name} (upload {len(content) / 1024:.0f} KiB):")
+        for codec, profile in CODECS.items():
+            start = time.perf_counter()
+            data = encode(content, profile).getvalue()
+            elapsed = time.perf_counter() - start
+            print(f"  {codec:<9} {len(data) / 1024:8.0f} KiB {elapsed * 1000:8.1f} ms")
+
+
+def score_codecs():
+    if not tesseract_available():
+        print("tesseract not available, skipping OCR accuracy")
+        return
+
+    scores = {codec: [] for codec in CODECS}
+    with tempfile.TemporaryDirectory() as tmp:
+        for entry in labeled_images():
+            with open(os.path.join(APP_DIR, entry["image"]), "rb") as f:
+                content = f.read()
+            for codec, profile in CODECS.items():
+                # stored the way ImageIngest would, then read back the way the OCR job does
+                path = os.path.join(tmp, "receipt." + profile.format.lower())
+                with open(path, "wb") as f:
+                    f.write(encode(content, profile).getvalue())
+                scores[codec].append(ocr_accuracy(ocr_engine.recognize(path), entry))
+    for codec, codec_scores in scores.items():
+        print(f"  {codec:<9} {summarize(codec_scores)}")
+
+
+async def run_legacy(samples, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for content in samples.values():
+            legacy_standardize(content)
+    return rounds * len(samples) / (time.perf_counter() - start)
+
+
+async def run_pool(pool, samples, rounds, profile):
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        loop.run_in_executor(pool, normalize, content, PROFILES[profile])
+        for _ in range(rounds)
+        for content in samples.values()
+    ])
+    return rounds * len(samples) / (time.perf_counter() - start)
+
+
+async def main(args):
+    samples = sample_images()
+    print(f"{len(samples)} images x {args.rounds} rounds")
+    print(f"legacy standardize:       {await run_legacy(samples, args.rounds):7.2f} uploads/s")
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        # warm the workers up so process start-up is not counted
+        await run_pool(pool, samples, 1, "pfp")
+        for profile in PROFILES:
+            rate = await run_pool(pool, samples, args.rounds, profile)
+            print(f"ingest pool ({profile:>7}):  {rate:7.2f} uploads/s")
+
+    print("storage codecs (full resolution):")
+    compare_codecs(samples)
+    print("OCR accuracy by storage codec (labeled receipts):")
+    score_codecs()
+
+    print("per-upload save path (receipt profile, one fresh process each):")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, content in samples.items():
+            path = os.path.join(tmp, name + ".png")
+            print(f"{name}:")
+            profile_save("legacy", legacy_save, content, path)
+            profile_save("ingest", ingest, content, PROFILES["receipt"], path)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rounds", type=int, default=5)
+    ap.add_argument("--workers", type=int, default=os.cpu_count())
+    asyncio.run(main(ap.parse_args()))
@@ -0,0 +1,81 @@
+"""
+Per-stage latency of the in-process OCR pipeline (ocr_engine) on the sample
+receipts and app/images: decode, resize, CLAHE, denoise (--profile),
+threshold and tesseract, as the median over --rounds runs. The tesseract
+stage is skipped when the binary is not installed.
+
+    python benchmarks/ocr.py --rounds 3 --profile balanced
+"""
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+import ocr_engine
+
+
+def sample_paths():
+    paths = [os.path.join(APP_DIR, "receipt.jpg"), os.path.join(APP_DIR, "trader.jpg")]
+    paths += sorted(glob.glob(os.path.join(APP_DIR, "images", "*")))
+    return paths
+
+
+def tesseract_available():
+    try:
+        ocr_engine.pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+def run_stages(path, with_tesseract, args):
+    timings = {}
+
+    def timed(name, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        timings[name] = time.perf_counter() - start
+        return result
+
+    image = timed("decode", ocr_engine.load, path)
+    image = timed("resize", ocr_engine.resize, image)
+    image = timed("clahe", ocr_engine.clahe, image)
+    image = timed("denoise", ocr_engine.denoise, image, args.profile)
+    image = timed("threshold", ocr_engine.threshold, image)
+    if with_tesseract:
+        timed("tesseract", ocr_engine.tesseract, image)
+    return timings
+
+
+def main(args):
+    with_tesseract = tesseract_available()
+    if not with_tesseract:
+        print("tesseract not available, skipping the tesseract stage")
+
+    stages = ["decode", "resize", "clahe", "denoise", "threshold"]
+    if with_tesseract:
+        stages.append("tesseract")
+
+    print(f"median ms over {args.rounds} rounds")
+    print(f"{'image':<28}" + "".join(f"{stage:>11}" for stage in stages) + f"{'total':>11}")
+    for path in sample_paths():
+        name = os.path.basename(path)
+        try:
+            runs = [run_stages(path, with_tesseract, args) for _ in range(args.rounds)]
+        except FileNotFoundError:
+            print(f"{name:<28} skipped: OpenCV cannot decode it")
+            continue
+        medians = [statistics.median(run[stage] for run in runs) * 1000 for stage in stages]
+        print(f"{name[:27]:<28}" + "".join(f"{ms:11.1f}" for ms in medians) + f"{sum(medians):11.1f}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rounds", type=int, default=3)
+    ap.add_argument("--profile", default="quality", help="denoise profile or denoiser name")
+    main(ap.parse_args())
@@ -0,0 +1,124 @@
+"""
+Precision/recall and latency of the rule-based receipt parser
+(receipt_parser.parse_receipt) on the labeled corpus in
+receipt_corpus.json. Each entry is scored on its transcribed text and,
+with tesseract installed, on the OCR of its image too. Entries without an
+image are typed-up receipts covering layouts the repo has no photo of.
+
+    python benchmarks/parser.py --rounds 1000
+"""
+import argparse
+import difflib
+import json
+import os
+import statistics
+import sys
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from receipt_parser import parse_receipt
+from benchmarks.ocr import tesseract_available
+
+CORPUS = os.path.join(APP_DIR, "benchmarks", "receipt_corpus.json")
+SUMMARY_FIELDS = ["subtotal", "tax", "tip", "total"]
+
+
+def matched_items(found, expected):
+    # an item counts when its price matches and its name is close to a labeled one
+    remaining = list(expected)
+    hits = 0
+    for item in found:
+        for label in remaining:
+            similar = difflib.SequenceMatcher(None, item["name"].lower(), label["name"].lower()).ratio()
+            if abs(item["price"] - label["price"]) < 0.005 and similar >= 0.8:
+                remaining.remove(label)
+                hits += 1
+                break
+    return hits
+
+
+def labeled_images():
+    # entries with a photo, so OCR output can be scored against their transcription
+    with open(CORPUS) as f:
+        return [entry for entry in json.load(f) if entry["image"]]
+
+
+def ocr_accuracy(text, entry):
+    # character similarity to the transcription, and what the parser gets out of the text
+    parsed = parse_receipt(text)
+    return {
+        "text": difflib.SequenceMatcher(None, entry["text"], text, autojunk=False).ratio(),
+        "items": matched_items(parsed.items, entry["items"]),
+        "labeled": len(entry["items"]),
+        "fields": sum(getattr(parsed, field) == entry[field] for field in SUMMARY_FIELDS),
+    }
+
+
+def summarize(scores):
+    items = sum(score["items"] for score in scores) / max(1, sum(score["labeled"] for score in scores))
+    return (f"text {statistics.mean(score['text'] for score in scores):.3f}   items {items:.3f}   "
+            f"summary fields {sum(score['fields'] for score in scores) / (len(scores) * len(SUMMARY_FIELDS)):.3f}")
+
+
+def time_parse(text, rounds):
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        parse_receipt(text)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def score(name, text, entry, rounds, totals):
+    parsed = parse_receipt(text)
+    hits = matched_items(parsed.items, entry["items"])
+    fields = sum(getattr(parsed, field) == entry[field] for field in SUMMARY_FIELDS)
+    totals["hits"] += hits
+    totals["found"] += len(parsed.items)
+    totals["expected"] += len(entry["items"])
+    totals["fields"] += fields
+    totals["entries"] += 1
+    print(f"  {name:<26} items {hits}/{len(parsed.items)} found, {len(entry['items'])} labeled   "
+          f"summary {fields}/{len(SUMMARY_FIELDS)}   confidence {parsed.confidence:.2f}   "
+          f"{time_parse(text, rounds) * 1e6:7.1f} us")
+
+
+def report(label, totals):
+    if not totals["entries"]:
+        return
+    precision = totals["hits"] / totals["found"] if totals["found"] else 1.0
+    recall = totals["hits"] / totals["expected"] if totals["expected"] else 1.0
+    print(f"{label}: precision {precision:.3f}  recall {recall:.3f}  "
+          f"summary fields {totals['fields'] / (totals['entries'] * len(SUMMARY_FIELDS)):.3f}")
+
+
+def main(args):
+    with open(CORPUS) as f:
+        corpus = json.load(f)
+
+    with_ocr = tesseract_available()
+    if with_ocr:
+        import ocr_engine
+    else:
+        print("tesseract not available, scoring the transcriptions only")
+
+    transcribed = {"hits": 0, "found": 0, "expected": 0, "fields": 0, "entries": 0}
+    ocr = dict(transcribed)
+    for entry in corpus:
+        print(f"{entry.get('name') or entry['image']}:")
+        score("transcription", entry["text"], entry, args.rounds, transcribed)
+        if with_ocr and entry["image"]:
+            text = ocr_engine.recognize(os.path.join(APP_DIR, entry["image"]), args.profile)
+            score(f"ocr ({args.profile})", text, entry, args.rounds, ocr)
+
+    report("transcriptions", transcribed)
+    report("ocr", ocr)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rounds", type=int, default=1000)
+    ap.add_argument("--profile", default="quality", help="OCR denoise profile")
+    main(ap.parse_args())
@@ -0,0 +1,102 @@
+"""
+Throughput of the /users/me lookup (users.username = ?) against a local
+PostgREST stand-in, comparing the old blocking client with the async one.
+
+    python benchmarks/repository.py --requests 500 --concurrency 100 --latency 0.02
+"""
+import argparse
+import asyncio
+import threading
+import time
+from aiohttp import web
+from supabase import AsyncClient, create_client
+
+
+USER = {
+    "user_id": 1,
+    "name": "Ryan",
+    "username": "ryan",
+    "phone": "1234567890",
+    "created_at": "2025-02-18T02:15:40.494144+00:00",
+    "imageUri": None,
+}
+
+
+async def start_stub(port, latency):
+    async def handler(request):
+        await asyncio.sleep(latency)
+        return web.json_response([USER])
+
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+async def blocking_get_by_username(client, username):
+    # what BaseRepository did before: a sync .execute() inside an async def
+    return client.table("users").select("*").eq("username", username).execute().data[0]
+
+
+async def async_get_by_username(client, username):
+    response = await client.table("users").select("*").eq("username", username).execute()
+    return response.data[0]
+
+
+async def run(lookup, client, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await lookup(client, "ryan")
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(requests)])
+    return requests / (time.perf_counter() - start)
+
+
+async def main(args):
+    # the blocking client stalls the loop, so the stub runs in its own thread
+    stub_loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    runners = []
+
+    def serve():
+        asyncio.set_event_loop(stub_loop)
+        runners.append(stub_loop.run_until_complete(start_stub(args.port, args.latency)))
+        ready.set()
+        stub_loop.run_forever()
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    ready.wait()
+
+    url = f"http://127.0.0.1:{args.port}"
+    sync_client = create_client(url, args.key)
+    async_client = AsyncClient(url, args.key)
+
+    before = await run(blocking_get_by_username, sync_client, args.requests, args.concurrency)
+    after = await run(async_get_by_username, async_client, args.requests, args.concurrency)
+    await async_client.postgrest.aclose()
+
+    print(f"blocking client: {before:8.1f} req/s")
+    print(f"async client:    {after:8.1f} req/s")
+    print(f"speedup:         {after / before:8.1f}x")
+
+    asyncio.run_coroutine_threadsafe(runners[0].cleanup(), stub_loop).result()
+    stub_loop.call_soon_threadsafe(stub_loop.stop)
+    thread.join()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=500)
+    ap.add_argument("--concurrency", type=int, default=100)
+    ap.add_argument("--latency", type=float, default=0.02,
+                    help="simulated database round-trip in seconds")
+    ap.add_argument("--port", type=int, default=54321)
+    # create_client only accepts JWT-shaped keys; the stub server never checks it
+    ap.add_argument("--key", default="eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.eyJyb2xlIjoiYW5vbiJ9.c3R1Yg")
+    asyncio.run(main(ap.parse_args()))
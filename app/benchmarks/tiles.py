@@ -0,0 +1,77 @@
+"""
+Wall-clock latency of OcrEngine.read on the sample receipts as the worker
+count grows, i.e. how well reading a receipt in parallel strips scales
+with cores. A receipt is cut into one strip per worker down to
+--min-strip-height, so at the default 100 px up to 20 workers get a strip.
+Needs the tesseract binary; without it only the strip layout is printed.
+
+    python benchmarks/tiles.py --rounds 3 --max-workers 16
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+import ocr_engine
+from benchmarks.ocr import tesseract_available
+
+SAMPLES = ["receipt.jpg", "trader.jpg"]
+
+
+def worker_counts(max_workers):
+    counts = [1]
+    while counts[-1] * 2 <= max_workers:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != max_workers:
+        counts.append(max_workers)
+    return counts
+
+
+async def time_read(engine, path, rounds):
+    await engine.read(path)  # warm the pool up
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await engine.read(path)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+async def main(args):
+    counts = worker_counts(args.max_workers)
+    for name in SAMPLES:
+        binary = ocr_engine.preprocess_path(os.path.join(APP_DIR, name), args.profile)
+        strips = ocr_engine.strip_count(binary.shape[0], counts[-1], args.min_strip_height)
+        print(f"{name} ({binary.shape[1]}x{binary.shape[0]}), strips at {counts[-1]} workers: "
+              f"{ocr_engine.split_strips(binary, strips, args.overlap)}")
+
+    if not tesseract_available():
+        print("tesseract not available, skipping the timings")
+        return
+
+    print(f"{'workers':>8}" + "".join(f"{name:>16}" for name in SAMPLES))
+    baseline = {}
+    for workers in counts:
+        engine = ocr_engine.OcrEngine(workers, args.profile, args.min_strip_height, args.overlap)
+        line = f"{workers:>8}"
+        for name in SAMPLES:
+            seconds = await time_read(engine, os.path.join(APP_DIR, name), args.rounds)
+            baseline.setdefault(name, seconds)
+            line += f"{seconds * 1000:9.0f} ms {baseline[name] / seconds:4.1f}x"
+        print(line)
+        engine.shutdown()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rounds", type=int, default=3)
+    ap.add_argument("--max-workers", type=int, default=os.cpu_count())
+    ap.add_argument("--profile", default="balanced")
+    ap.add_argument("--min-strip-height", type=int, default=100)
+    ap.add_argument("--overlap", type=int, default=40)
+    asyncio.run(main(ap.parse_args()))
@@ -0,0 +1,88 @@
+"""
+Tokens/sec for issuing and verifying access tokens: PyJWT called the way
+AuthService used to (string secret and algorithm list on every call)
+against token_engine, for fresh tokens and for tokens already in the
+decoded-claims LRU, plus the EdDSA and ES256 modes when cryptography is
+installed.
+
+    python benchmarks/tokens.py --tokens 20000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+import jwt
+from token_engine import TokenSigner
+
+SECRET = "benchmark-secret-key-of-a-realistic-length-0123456789"
+
+
+def claims(i):
+    return {"sub": f"user{i}", "exp": datetime.now(timezone.utc) + timedelta(minutes=30)}
+
+
+def rate(fn, items):
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return len(items) / (time.perf_counter() - start)
+
+
+def report(name, encode, decode, count):
+    tokens = [encode(claims(i)) for i in range(count)]
+    issue = rate(encode, [claims(i) for i in range(count)])
+    verify = rate(decode, tokens)
+    line = f"  {name:<22} issue {issue:10.0f}/s   verify {verify:10.0f}/s"
+    if isinstance(getattr(decode, "__self__", None), TokenSigner):
+        # same tokens again, now answered from the claims LRU
+        line += f"   verify (cached) {rate(decode, tokens):10.0f}/s"
+    print(line)
+
+
+def asymmetric_signers():
+    try:
+        from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+    except ImportError:
+        print("  cryptography not installed, skipping EdDSA/ES256")
+        return []
+    ed_key = ed25519.Ed25519PrivateKey.generate()
+    ec_key = ec.generate_private_key(ec.SECP256R1())
+    return [
+        ("EdDSA", ed_key, ed_key.public_key()),
+        ("ES256", ec_key, ec_key.public_key()),
+    ]
+
+
+def main(args):
+    count = args.tokens
+    print(f"{count} tokens")
+
+    report(
+        "pyjwt HS256",
+        lambda c: jwt.encode(c, SECRET, algorithm="HS256"),
+        lambda t: jwt.decode(t, SECRET, algorithms=["HS256"]),
+        count
+    )
+    signer = TokenSigner("HS256", SECRET, SECRET, cache_size=count)
+    report("engine HS256", signer.encode, signer.decode, count)
+
+    for algorithm, private_key, public_key in asymmetric_signers():
+        report(
+            f"pyjwt {algorithm}",
+            lambda c: jwt.encode(c, private_key, algorithm=algorithm),
+            lambda t: jwt.decode(t, public_key, algorithms=[algorithm]),
+            count // 10
+        )
+        signer = TokenSigner(algorithm, private_key, public_key, cache_size=count)
+        report(f"engine {algorithm}", signer.encode, signer.decode, count // 10)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tokens", type=int, default=20000)
+    main(ap.parse_args())
@@ -0,0 +1,103 @@
+import asyncio
+
+
+COALESCE = "coalesce"
+DROP_SLOWEST = "drop_slowest"
+
+
+class Subscriber:
+    def __init__(self, websocket, queue_size: int):
+        self.websocket = websocket
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.task: asyncio.Task | None = None
+
+
+class Broadcaster:
+    """
+    Fans messages out to websockets through bounded per-connection queues
+    so one slow client never holds up the others
+    """
+    def __init__(self, queue_size: int = 8, policy: str = COALESCE, send_timeout: float = 5.0):
+        if policy not in (COALESCE, DROP_SLOWEST):
+            raise ValueError(f"Unknown backpressure policy: {policy}")
+        self.queue_size = queue_size
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.subscribers: dict = {}
+        self.closing: set[asyncio.Task] = set()
+
+
+    def __len__(self):
+        return len(self.subscribers)
+
+
+    def connect(self, websocket) -> Subscriber:
+        subscriber = Subscriber(websocket, self.queue_size)
+        subscriber.task = asyncio.create_task(self._send_loop(subscriber))
+        self.subscribers[websocket] = subscriber
+        return subscriber
+
+
+    def disconnect(self, websocket):
+        subscriber = self.subscribers.pop(websocket, None)
+        if subscriber is not None and subscriber.task is not asyncio.current_task():
+            subscriber.task.cancel()
+
+
+    def send(self, websocket, message: str):
+        subscriber = self.subscribers.get(websocket)
+        if subscriber is not None:
+            self._enqueue(subscriber, message)
+
+
+    def publish(self, message: str):
+        for subscriber in list(self.subscribers.values()):
+            self._enqueue(subscriber, message)
+
+
+    async def close(self):
+        tasks = [subscriber.task for subscriber in self.subscribers.values()]
+        self.subscribers.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, *self.closing, return_exceptions=True)
+
+
+    def _enqueue(self, subscriber: Subscriber, message: str):
+        if not subscriber.queue.full():
+            subscriber.queue.put_nowait(message)
+        elif self.policy == COALESCE:
+            # only the newest value matters, throw away what the client has not seen yet
+            while not subscriber.queue.empty():
+                subscriber.queue.get_nowait()
+            subscriber.queue.put_nowait(message)
+        else:
+            print(f"Dropping slow client: {subscriber.websocket.client}")
+            self.disconnect(subscriber.websocket)
+            # keep a reference so the close is not garbage-collected halfway
+            task = asyncio.create_task(self._close(subscriber.websocket))
+            self.closing.add(task)
+            task.add_done_callback(self.closing.discard)
+
+
+    async def _send_loop(self, subscriber: Subscriber):
+        try:
+            while True:
+                message = await subscriber.queue.get()
+                # asyncio.timeout rather than wait_for, which can swallow a
+                # cancel that lands just as the send completes
+                async with asyncio.timeout(self.send_timeout):
+                    await subscriber.websocket.send_text(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Failed to send to client: {e}")
+            self.disconnect(subscriber.websocket)
+            await self._close(subscriber.websocket)
+
+
+    async def _close(self, websocket):
+        try:
+            await websocket.close()
+        except Exception:
+            pass
@@ -1,7 +1,15 @@
+from pydantic import field_validator
 from pydantic_settings import BaseSettings
 from typing import List
 from functools import lru_cache
 
+# storage formats for uploaded images and the file extension each is saved with
+IMAGE_EXTENSIONS = {
+    "PNG": "png",
+    "JPEG": "jpg",
+    "WEBP": "webp",
+}
+
 class Settings(BaseSettings):
     API_V1_STR: str = '/api/v1'
     PROJECT_NAME: str = 'Cover'
@@ -12,6 +20,13 @@ class Settings(BaseSettings):
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     REFRESH_TOKEN_EXPIRE_DAYS: int
+    JWT_CLAIMS_CACHE_SIZE: int = 4096
+    # set to EdDSA or ES256 to sign access tokens with a key pair other services can verify
+    JWT_ASYMMETRIC_ALGORITHM: str | None = None
+    JWT_PRIVATE_KEY_PATH: str | None = None
+    JWT_PUBLIC_KEY_PATH: str | None = None
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
     PORT: int = 8000
     
     ALLOWED_ORIGINS: List[str] = [
@@ -22,6 +37,9 @@ class Settings(BaseSettings):
     ]
     
     PSQL_URL: str
+    PSQL_POOL_MIN_SIZE: int = 1
+    PSQL_POOL_MAX_SIZE: int = 10
+    PSQL_POOL_ACQUIRE_TIMEOUT: float = 5.0
     DATABASE_URL: str
     SUPABASE_KEY: str
     TWILIO_ASID: str
@@ -31,7 +49,67 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str
     
     ENVIRONMENT: str
+
+    RECEIPT_EVENTS_RECHECK_SECONDS: int = 30
+    USER_COUNT_RESYNC_SECONDS: int = 300
+    WS_SEND_QUEUE_SIZE: int = 8
+    WS_BACKPRESSURE_POLICY: str = "coalesce"
+    WS_SEND_TIMEOUT: float = 5.0
+    RELAY_SOCKET_PATH: str = "/tmp/cover-relay.sock"
+    RELAY_LOCK_PATH: str = "/tmp/cover-relay.lock"
+
+    IMAGE_WORKERS: int = 2
+    # lossless until benchmarks/images.py shows a lossy codec scoring the same on the labeled receipts
+    RECEIPT_IMAGE_FORMAT: str = "PNG"
+    RECEIPT_IMAGE_QUALITY: int = 90  # ignored by PNG
+    PFP_IMAGE_FORMAT: str = "WEBP"
+    PFP_IMAGE_QUALITY: int = 80
+    GROUP_IMAGE_FORMAT: str = "WEBP"
+    GROUP_IMAGE_QUALITY: int = 80
+    THUMBNAIL_MAX_SIZE: int = 1024
+    THUMBNAIL_CACHE_BYTES: int = 256 * 1024 * 1024
+    IMAGE_CACHE_BYTES: int = 64 * 1024 * 1024
+    IMAGE_CACHE_MAX_ITEM_BYTES: int = 256 * 1024
+
+    JOB_DB_PATH: str = "../storage/jobs.sqlite3"
+    JOB_CONCURRENCY: int = 4
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_BACKOFF_SECONDS: float = 2.0
+    JOB_VISIBILITY_TIMEOUT: float = 300.0
+    GPT_SERVICE_TIMEOUT: float = 120.0
+    OCR_SERVICE_URL: str = "http://0.0.0.0:8001"
+    # hand-offs only come from the job worker, so at most JOB_CONCURRENCY are in flight
+    OCR_SERVICE_MAX_CONNECTIONS: int = 10
+    OCR_SERVICE_CONNECT_RETRIES: int = 2
+    OCR_SERVICE_HTTP2: bool = False  # needs a service that speaks HTTP/2
+
+    # "remote" posts to the OCR service, "local" runs it in a process pool; only "local"
+    # streams extracted items to websocket subscribers, the OCR service's reply is not streamed
+    OCR_BACKEND: str = "remote"
+    OCR_WORKERS: int = 2
+    OCR_DENOISE_PROFILE: str = "quality"  # "quality", "balanced" or "fast"
+    OCR_MIN_STRIP_HEIGHT: int = 100  # receipts are split into one strip per OCR worker down to this
+    OCR_STRIP_OVERLAP: int = 40
+    RECEIPT_MODEL: str = "gpt-4o-mini"
+    RECEIPT_PARSER_MIN_CONFIDENCE: float = 0.9  # rule-based parse is used as is at or above this
+    LLM_CACHE_PATH: str = "../storage/extractions.sqlite3"
+    LLM_CACHE_TTL_SECONDS: int = 30 * 24 * 3600
+    LLM_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    # receipts extracted in one request; batches can't outgrow JOB_CONCURRENCY jobs in flight
+    LLM_BATCH_MAX_ITEMS: int = 4
+    LLM_BATCH_MAX_WAIT_MS: int = 250
+
+    RECEIPT_INDEX_PATH: str = "../storage/receipts.sqlite3"
+    RECEIPT_DUPLICATE_DISTANCE: int = 6  # max differing dHash bits for a near-duplicate upload
     
+    @field_validator("RECEIPT_IMAGE_FORMAT", "PFP_IMAGE_FORMAT", "GROUP_IMAGE_FORMAT")
+    @classmethod
+    def image_format(cls, value: str) -> str:
+        value = value.upper().strip()
+        if value not in IMAGE_EXTENSIONS:
+            raise ValueError(f"must be one of {', '.join(IMAGE_EXTENSIONS)}")
+        return value
+
     model_config = {
         "env_file": ".env",
         "case_sensitive": True
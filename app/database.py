@@ -1,6 +1,94 @@
-from supabase import create_client, Client
+import time
+import asyncpg
+from contextlib import asynccontextmanager
+from supabase import AsyncClient
 from config import settings
 
 
-supabase: Client = create_client(settings.DATABASE_URL, settings.SUPABASE_KEY)
+# async PostgREST client: queries are awaited on the event loop instead of
+# blocking it for the whole HTTP round-trip
+supabase: AsyncClient = AsyncClient(settings.DATABASE_URL, settings.SUPABASE_KEY)
 
+
+class PgPool:
+    """
+    Application-lifetime asyncpg pool for raw SQL and LISTEN connections
+    """
+    def __init__(self, dsn: str, min_size: int, max_size: int, acquire_timeout: float):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.pool: asyncpg.Pool | None = None
+        self.acquired = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+
+
+    async def open(self):
+        self.pool = await asyncpg.create_pool(
+            self.dsn,
+            min_size=self.min_size,
+            max_size=self.max_size
+        )
+
+
+    async def close(self):
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
+
+    @asynccontextmanager
+    async def acquire(self):
+        start = time.perf_counter()
+        try:
+            conn = await self.pool.acquire(timeout=self.acquire_timeout)
+        except TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.wait_time += time.perf_counter() - start
+
+        self.acquired += 1
+        try:
+            yield conn
+        finally:
+            await self.pool.release(conn)
+
+
+    async def fetchval(self, query: str, *args):
+        async with self.acquire() as conn:
+            return await conn.fetchval(query, *args)
+
+
+    async def listen(self, channel: str, callback) -> asyncpg.Connection:
+        # LISTEN needs a connection of its own for as long as it is subscribed
+        conn = await self.pool.acquire(timeout=self.acquire_timeout)
+        await conn.add_listener(channel, callback)
+        return conn
+
+
+    async def unlisten(self, conn: asyncpg.Connection, channel: str, callback):
+        await conn.remove_listener(channel, callback)
+        await self.pool.release(conn)
+
+
+    def metrics(self) -> dict:
+        return {
+            "size": self.pool.get_size() if self.pool else 0,
+            "idle": self.pool.get_idle_size() if self.pool else 0,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "acquired": self.acquired,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": (self.wait_time / max(self.acquired + self.timeouts, 1)) * 1000,
+        }
+
+
+pg_pool = PgPool(
+    settings.PSQL_URL,
+    min_size=settings.PSQL_POOL_MIN_SIZE,
+    max_size=settings.PSQL_POOL_MAX_SIZE,
+    acquire_timeout=settings.PSQL_POOL_ACQUIRE_TIMEOUT
+)
@@ -1,19 +1,20 @@
 from database import supabase
 from schemas import CreateUG, CreateFriendShip
-from dependencies import UGRepositoryDep
-import asyncio
+from dependencies import UGRepositoryDep, get_token_cache
 
 async def delete_user_account(user_id: int):
-    return await asyncio.to_thread(
-        lambda: supabase.rpc("delete_user_cascade", {
+    response = await (
+        supabase.rpc("delete_user_cascade", {
                 "p_user_id": user_id
             })\
             .execute()
     )
+    get_token_cache().invalidate_user(user_id)
+    return response
 
 async def get_user_groups(user_id: int):
-    return await asyncio.to_thread( 
-        lambda: supabase.table("users_groups")\
+    return await (
+        supabase.table("users_groups")\
             .select("*, groups(*)")\
             .eq("user_id", user_id)\
             .execute() 
@@ -21,8 +22,8 @@ async def get_user_groups(user_id: int):
 
 
 async def get_group(group_id: int):
-    return await asyncio.to_thread( 
-        lambda: supabase.table("users_groups")\
+    return await (
+        supabase.table("users_groups")\
             .select("*, users(*)")\
             .eq("group_id", group_id)\
             .execute() 
@@ -38,16 +39,16 @@ async def add_users_to_groups(
 
 
 async def add_friendship(data: CreateFriendShip):
-    return await asyncio.to_thread(
-        lambda: supabase.table("friends")\
+    return await (
+        supabase.table("friends")\
             .insert(data.model_dump())\
             .execute()
     )
 
 
 async def check_friendship(user_1: int, user_2: int):
-    result = await asyncio.to_thread(
-        lambda: supabase.rpc('check_friendship', {
+    result = await (
+        supabase.rpc('check_friendship', {
             'user_id_1': user_1,
             'user_id_2': user_2
         }).execute()
@@ -56,8 +57,8 @@ async def check_friendship(user_1: int, user_2: int):
 
 
 async def get_friendship(user_1: int, user_2: int):
-    result = await asyncio.to_thread(
-        lambda: supabase.rpc('get_friendship', {
+    result = await (
+        supabase.rpc('get_friendship', {
             'user_id_1': user_1,
             'user_id_2': user_2
         }).execute()
@@ -65,8 +66,8 @@ async def get_friendship(user_1: int, user_2: int):
     return result.data[0]
 
 async def get_friend_requests(user_id: int):
-    result = await asyncio.to_thread(
-        lambda: supabase.rpc('get_friend_requests', {
+    result = await (
+        supabase.rpc('get_friend_requests', {
             'id': user_id
         }).execute()
     )
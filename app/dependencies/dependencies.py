@@ -5,8 +5,18 @@ from supabase import create_client, Client as SupabaseClient
 from functools import lru_cache
 from fastapi import Depends, Request
 from repositories import UserRepository, ReceiptRepository, FriendRepository, GroupRepository, UGRepository, SplitRepository
-from services import AuthService, UserService, TwilioService, MockTwilioService, ReceiptProcessor, MockAuthService, SplitService, GroupService
+from services import AuthService, UserService, TwilioService, MockTwilioService, ReceiptProcessor, MockAuthService, SplitService, GroupService, ReceiptEventBus
 from config import Settings, get_settings
+import os
+from imaging import ImageIngest, PROFILES
+from thumbnails import ThumbnailCache
+from image_cache import HotImageCache
+from jobs import JobQueue
+from ocr_engine import OcrEngine
+from receipt_index import ReceiptIndex
+from llm_cache import ExtractionCache
+from token_cache import TokenCache
+from token_engine import TokenEngine
 
 settings = get_settings()
 
@@ -14,9 +24,20 @@ settings = get_settings()
 repositories
 """
 
+@lru_cache()
+def get_token_engine() -> TokenEngine:
+    return TokenEngine(settings)
+
+@lru_cache()
+def get_token_cache() -> TokenCache:
+    return TokenCache(
+        max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS
+    )
+
 @lru_cache()
 def get_user_repository() -> UserRepository:
-    return UserRepository()
+    return UserRepository(token_cache=get_token_cache())
 
 @lru_cache()
 def get_receipt_repository() -> ReceiptRepository:
@@ -43,32 +64,141 @@ services
 """
 
 @lru_cache()
-def get_auth_service(repo: Annotated[UserRepository, Depends(get_user_repository)]) -> AuthService:
-    return AuthService(repository=repo)
+def get_receipt_event_bus() -> ReceiptEventBus:
+    return ReceiptEventBus()
+
+@lru_cache()
+def get_job_queue() -> JobQueue:
+    return JobQueue(
+        path=settings.JOB_DB_PATH,
+        visibility_timeout=settings.JOB_VISIBILITY_TIMEOUT
+    )
+
+@lru_cache()
+def get_ocr_service_client() -> httpx.AsyncClient:
+    # one keep-alive pool for every hand-off to the OCR service
+    return httpx.AsyncClient(
+        base_url=settings.OCR_SERVICE_URL,
+        http2=settings.OCR_SERVICE_HTTP2,
+        limits=httpx.Limits(
+            max_connections=settings.OCR_SERVICE_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OCR_SERVICE_MAX_CONNECTIONS
+        ),
+        timeout=httpx.Timeout(settings.GPT_SERVICE_TIMEOUT, connect=5.0),
+        # only failed connects are retried here; failed jobs go back through the job queue
+        transport=httpx.AsyncHTTPTransport(
+            http2=settings.OCR_SERVICE_HTTP2,
+            retries=settings.OCR_SERVICE_CONNECT_RETRIES
+        )
+    )
+
+@lru_cache()
+def get_receipt_index() -> ReceiptIndex:
+    return ReceiptIndex(settings.RECEIPT_INDEX_PATH, settings.RECEIPT_DUPLICATE_DISTANCE)
+
+@lru_cache()
+def get_extraction_cache() -> ExtractionCache:
+    return ExtractionCache(
+        settings.LLM_CACHE_PATH,
+        ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+        max_bytes=settings.LLM_CACHE_MAX_BYTES
+    )
+
+@lru_cache()
+def get_ocr_engine() -> OcrEngine | None:
+    if settings.OCR_BACKEND != "local":
+        return None
+    return OcrEngine(
+        workers=settings.OCR_WORKERS,
+        profile=settings.OCR_DENOISE_PROFILE,
+        min_strip_height=settings.OCR_MIN_STRIP_HEIGHT,
+        strip_overlap=settings.OCR_STRIP_OVERLAP
+    )
+
+@lru_cache()
+def get_image_ingest() -> ImageIngest:
+    return ImageIngest(
+        workers=settings.IMAGE_WORKERS,
+        profiles={
+            "receipt": PROFILES["receipt"]._replace(
+                format=settings.RECEIPT_IMAGE_FORMAT,
+                quality=settings.RECEIPT_IMAGE_QUALITY
+            ),
+            "pfp": PROFILES["pfp"]._replace(
+                format=settings.PFP_IMAGE_FORMAT,
+                quality=settings.PFP_IMAGE_QUALITY
+            ),
+            "group": PROFILES["group"]._replace(
+                format=settings.GROUP_IMAGE_FORMAT,
+                quality=settings.GROUP_IMAGE_QUALITY
+            ),
+        }
+    )
+
+@lru_cache()
+def get_auth_service(
+    repo: Annotated[UserRepository, Depends(get_user_repository)],
+    tokens: Annotated[TokenEngine, Depends(get_token_engine)],
+    token_cache: Annotated[TokenCache, Depends(get_token_cache)]
+) -> AuthService:
+    return AuthService(repository=repo, tokens=tokens, token_cache=token_cache)
 
 @lru_cache()
 def get_user_service(
     repo: Annotated[UserRepository, Depends(get_user_repository)],
     auth: Annotated[AuthService, Depends(get_auth_service)],
-    friend_repo: Annotated[FriendRepository, Depends(get_friend_repository)]
+    friend_repo: Annotated[FriendRepository, Depends(get_friend_repository)],
+    images: Annotated[ImageIngest, Depends(get_image_ingest)]
 ) -> UserService:
-    return UserService(repository=repo, auth=auth, friend_repo=friend_repo)
+    return UserService(repository=repo, auth=auth, friend_repo=friend_repo, images=images)
 
 @lru_cache()
-def get_receipt_processor(
-    repo: Annotated[ReceiptRepository, Depends(get_receipt_repository)]
-) -> ReceiptProcessor:
-    return ReceiptProcessor(repository=repo)
+def get_receipt_processor() -> ReceiptProcessor:
+    # no parameters, so main's job worker and the endpoints get the same instance
+    return ReceiptProcessor(
+        repository=get_receipt_repository(),
+        events=get_receipt_event_bus(),
+        images=get_image_ingest(),
+        jobs=get_job_queue(),
+        index=get_receipt_index(),
+        cache=get_extraction_cache(),
+        http=get_ocr_service_client(),
+        ocr=get_ocr_engine()
+    )
 
 @lru_cache()
 def get_split_service(repo: Annotated[SplitRepository, Depends(get_split_repository)]):
     return SplitService(split_repo=repo)
 
 @lru_cache()
-def get_group_service(repo: Annotated[GroupRepository, Depends(get_group_repository)]):
-    return GroupService(repo=repo)
+def get_group_service(
+    repo: Annotated[GroupRepository, Depends(get_group_repository)],
+    images: Annotated[ImageIngest, Depends(get_image_ingest)]
+):
+    return GroupService(repo=repo, images=images)
+
+@lru_cache()
+def get_thumbnail_cache() -> ThumbnailCache:
+    return ThumbnailCache(
+        images=get_image_ingest(),
+        directory=os.path.join(
+            os.path.dirname(
+                os.path.dirname(os.path.dirname(__file__))
+            ),
+            "storage/thumbnails/"
+        ),
+        max_bytes=settings.THUMBNAIL_CACHE_BYTES
+    )
+
+@lru_cache()
+def get_image_cache() -> HotImageCache:
+    return HotImageCache(
+        max_bytes=settings.IMAGE_CACHE_BYTES,
+        max_item_bytes=settings.IMAGE_CACHE_MAX_ITEM_BYTES
+    )
 
 ReceiptProcessorDep = Annotated[ReceiptProcessor, Depends(get_receipt_processor)]
+ReceiptEventBusDep = Annotated[ReceiptEventBus, Depends(get_receipt_event_bus)]
 UserRepositoryDep = Annotated[UserRepository, Depends(get_user_repository)]
 FriendRepositoryDep = Annotated[FriendRepository, Depends(get_friend_repository)]
 ReceiptRepositoryDep = Annotated[ReceiptRepository, Depends(get_receipt_repository)]
@@ -80,6 +210,11 @@ AuthServiceDep = Annotated[AuthService, Depends(get_auth_service)]
 UserServiceDep = Annotated[UserService, Depends(get_user_service)]
 SplitServiceDep = Annotated[SplitService, Depends(get_split_service)]
 GroupServiceDep = Annotated[GroupService, Depends(get_group_service)]
+ThumbnailCacheDep = Annotated[ThumbnailCache, Depends(get_thumbnail_cache)]
+HotImageCacheDep = Annotated[HotImageCache, Depends(get_image_cache)]
+JobQueueDep = Annotated[JobQueue, Depends(get_job_queue)]
+ExtractionCacheDep = Annotated[ExtractionCache, Depends(get_extraction_cache)]
+OcrServiceClientDep = Annotated[httpx.AsyncClient, Depends(get_ocr_service_client)]
 
 """
 Third Part Clients
@@ -0,0 +1,79 @@
+from collections import OrderedDict
+from typing import NamedTuple
+
+
+class CachedImage(NamedTuple):
+    body: bytes
+    media_type: str
+    headers: dict
+    mtime_ns: int  # of the stored original the entry was made from
+
+
+class HotImageCache:
+    """
+    Byte-budgeted LRU of small, frequently requested images with their
+    response headers. A hit costs one stat of the original, so an image
+    that was replaced or deleted on disk is not served from memory.
+    """
+    def __init__(self, max_bytes: int, max_item_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self.entries: OrderedDict[tuple, CachedImage] = OrderedDict()
+        self.variants: dict[tuple, set] = {}
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+
+    def get(self, bucket: str, name: str, w, h, mtime_ns: int) -> CachedImage | None:
+        key = (bucket, name, w, h)
+        entry = self.entries.get(key)
+        if entry is not None and entry.mtime_ns != mtime_ns:
+            self._remove(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+
+    def put(self, bucket: str, name: str, w, h, entry: CachedImage):
+        if len(entry.body) > self.max_item_bytes:
+            return
+        key = (bucket, name, w, h)
+        self._remove(key)
+        self.entries[key] = entry
+        self.variants.setdefault((bucket, name), set()).add(key)
+        self.total_bytes += len(entry.body)
+        while self.total_bytes > self.max_bytes:
+            self._remove(next(iter(self.entries)))
+
+
+    def invalidate(self, bucket: str, name: str):
+        for key in list(self.variants.get((bucket, name), ())):
+            self._remove(key)
+
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+    def _remove(self, key: tuple):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        self.total_bytes -= len(entry.body)
+        keys = self.variants[key[:2]]
+        keys.discard(key)
+        if not keys:
+            del self.variants[key[:2]]
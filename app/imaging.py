@@ -0,0 +1,119 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import NamedTuple
+from PIL import Image, ImageOps
+from config import IMAGE_EXTENSIONS
+
+
+class Fingerprint(NamedTuple):
+    sha256: str  # of the uploaded bytes
+    dhash: int  # 64-bit difference hash, close for visually similar images
+
+
+class ImageProfile(NamedTuple):
+    max_size: int | None  # longest edge in px, None keeps full resolution
+    format: str = "PNG"
+    quality: int | None = None  # ignored by lossless formats
+    fingerprint: bool = False  # whether ingest hashes the upload for duplicate detection
+
+
+PROFILES = {
+    "pfp": ImageProfile(max_size=512),
+    "group": ImageProfile(max_size=512),
+    "receipt": ImageProfile(max_size=None, fingerprint=True),
+}
+
+
+def encode(content: bytes, profile: ImageProfile) -> BytesIO:
+    image = Image.open(BytesIO(content))
+
+    if profile.max_size is not None:
+        # let the JPEG decoder scale down while decoding instead of after
+        image.draft("RGB", (profile.max_size, profile.max_size))
+
+    image = ImageOps.exif_transpose(image)
+
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+
+    if profile.max_size is not None:
+        image.thumbnail((profile.max_size, profile.max_size), Image.LANCZOS)
+
+    options = {}
+    if profile.quality is not None and profile.format != "PNG":
+        options["quality"] = profile.quality
+
+    output_buffer = BytesIO()
+    image.save(output_buffer, format=profile.format, **options)
+
+    return output_buffer
+
+
+def read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def write_atomic(data, path: str):
+    # readers only ever see a missing file or a complete one
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(memoryview(data))
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def dhash(content: bytes) -> int:
+    image = Image.open(BytesIO(content))
+    image.draft("L", (64, 64))
+    image = ImageOps.exif_transpose(image).convert("L").resize((9, 8), Image.LANCZOS)
+    pixels = list(image.getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return bits
+
+
+def fingerprint(content: bytes) -> Fingerprint:
+    return Fingerprint(hashlib.sha256(content).hexdigest(), dhash(content))
+
+
+def ingest(content: bytes, profile: ImageProfile, path: str) -> Fingerprint | None:
+    output_buffer = encode(content, profile)
+    # getbuffer() hands the encoded bytes to write() without copying them
+    write_atomic(output_buffer.getbuffer(), path)
+    return fingerprint(content) if profile.fingerprint else None
+
+
+class ImageIngest:
+    """
+    Decodes, orients and re-encodes uploads in a process pool so the event
+    loop never does image work
+    """
+    def __init__(self, workers: int, profiles: dict = PROFILES):
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.profiles = profiles
+
+
+    def extension(self, profile: str) -> str:
+        return IMAGE_EXTENSIONS[self.profiles[profile].format]
+
+
+    async def save(self, upload, profile: str, path: str) -> Fingerprint | None:
+        # encode and write in the worker so the image never comes back to this process
+        content = await upload.read()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, ingest, content, self.profiles[profile], path)
+
+
+    def shutdown(self):
+        self.pool.shutdown(cancel_futures=True)
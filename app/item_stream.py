@@ -0,0 +1,65 @@
+import json
+
+
+class ItemStreamParser:
+    """
+    Incremental parser for a streamed extraction reply shaped like
+    {"receipts": {"<receipt_id>": {"items": [{...}, ...]}}}. feed() takes
+    the next chunk of text and returns the (receipt_id, item) pairs whose
+    item object closed in it, so items can be shown before the reply ends.
+    """
+    ITEM_DEPTH = 5  # root {, receipts {, receipt {, items [, item {
+
+    def __init__(self):
+        self.stack = []
+        self.in_string = False
+        self.escaped = False
+        self.string_start = None
+        self.last_string = None
+        self.receipt_id = None
+        self.item_start = None
+        self.position = 0
+        self.text = ""  # the whole reply is a few KB, so it is kept rather than trimmed
+
+
+    def feed(self, chunk: str) -> list[tuple[int, dict]]:
+        self.text += chunk
+        found = []
+        while self.position < len(self.text):
+            char = self.text[self.position]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                    self.last_string = self.text[self.string_start + 1:self.position]
+            elif char == '"':
+                self.in_string = True
+                self.string_start = self.position
+            elif char in "{[":
+                self.stack.append(char)
+                if len(self.stack) == 3 and char == "{":
+                    # the key just before a receipt's object is its id
+                    self.receipt_id = self.last_string
+                elif len(self.stack) == self.ITEM_DEPTH and char == "{":
+                    self.item_start = self.position
+            elif char in "}]":
+                if len(self.stack) == self.ITEM_DEPTH and char == "}" and self.item_start is not None:
+                    item = self._parse(self.text[self.item_start:self.position + 1])
+                    if item is not None and (self.receipt_id or "").isdigit():
+                        found.append((int(self.receipt_id), item))
+                    self.item_start = None
+                if self.stack:
+                    self.stack.pop()
+            self.position += 1
+        return found
+
+
+    def _parse(self, text: str) -> dict | None:
+        try:
+            item = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+        return item if isinstance(item, dict) else None
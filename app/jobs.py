@@ -0,0 +1,252 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+from typing import NamedTuple
+
+
+class Job(NamedTuple):
+    job_id: int
+    kind: str
+    payload: dict
+    attempts: int
+    lease_token: str | None = None  # set by lease(); updates only land while it still matches
+
+
+class JobQueue:
+    """
+    Durable job queue in a local SQLite file. Workers lease a job for
+    visibility_timeout seconds and extend the lease while they run it; a job
+    whose lease runs out (worker crashed, hung or restarted) becomes visible
+    again, and each lease gets a new token so a worker that lost its lease
+    cannot overwrite the next one's result.
+    """
+    def __init__(self, path: str, visibility_timeout: float):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    available_at REAL NOT NULL,
+                    leased_until REAL,
+                    lease_token TEXT,
+                    last_error TEXT,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at)"
+            )
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "lease_token" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN lease_token TEXT")
+
+
+    def _connect(self) -> sqlite3.Connection:
+        # one short-lived connection per call; calls run in worker threads
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+
+    def enqueue(self, kind: str, payload: dict) -> int:
+        now = time.time()
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (kind, payload, available_at, created_at) VALUES (?, ?, ?, ?)",
+                (kind, json.dumps(payload), now, now)
+            )
+            return cursor.lastrowid
+
+
+    def lease(self, max_attempts: int | None = None) -> tuple[Job | None, list[Job]]:
+        """
+        The next job to run, and the jobs failed on the way because their
+        last allowed attempt died with its worker
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            exhausted = []
+            if max_attempts is not None:
+                rows = conn.execute("""
+                    SELECT job_id, kind, payload, attempts FROM jobs
+                    WHERE status = 'leased' AND leased_until <= ? AND attempts >= ?
+                """, (now, max_attempts)).fetchall()
+                for row in rows:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'failed', leased_until = NULL, lease_token = NULL, last_error = ? WHERE job_id = ?",
+                        (f"Lease expired on attempt {row['attempts']}", row["job_id"])
+                    )
+                exhausted = [Job(row["job_id"], row["kind"], json.loads(row["payload"]), row["attempts"]) for row in rows]
+
+            row = conn.execute("""
+                SELECT job_id, kind, payload, attempts FROM jobs
+                WHERE (status = 'queued' AND available_at <= ?)
+                   OR (status = 'leased' AND leased_until <= ?)
+                ORDER BY available_at
+                LIMIT 1
+            """, (now, now)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None, exhausted
+            token = uuid.uuid4().hex
+            conn.execute(
+                "UPDATE jobs SET status = 'leased', leased_until = ?, lease_token = ?, attempts = attempts + 1 WHERE job_id = ?",
+                (now + self.visibility_timeout, token, row["job_id"])
+            )
+            conn.execute("COMMIT")
+            return Job(row["job_id"], row["kind"], json.loads(row["payload"]), row["attempts"] + 1, token), exhausted
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+
+    def extend(self, job: Job) -> bool:
+        return self._update(job, "leased_until = ?", time.time() + self.visibility_timeout)
+
+
+    def complete(self, job: Job) -> bool:
+        return self._update(job, "status = 'done', leased_until = NULL, lease_token = NULL")
+
+
+    def retry(self, job: Job, delay: float, error: str) -> bool:
+        return self._update(
+            job, "status = 'queued', leased_until = NULL, lease_token = NULL, available_at = ?, last_error = ?",
+            time.time() + delay, error
+        )
+
+
+    def fail(self, job: Job, error: str) -> bool:
+        return self._update(job, "status = 'failed', leased_until = NULL, lease_token = NULL, last_error = ?", error)
+
+
+    def _update(self, job: Job, assignments: str, *values) -> bool:
+        # False when the lease has passed to another worker since this one took it
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE job_id = ? AND lease_token = ? AND status = 'leased'",
+                (*values, job.job_id, job.lease_token)
+            )
+            return cursor.rowcount == 1
+
+
+    def counts(self) -> dict:
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+            return {row["status"]: row["n"] for row in rows}
+
+
+class JobWorker:
+    """
+    Runs leased jobs with bounded concurrency, retrying failures with
+    exponential backoff until max_attempts. Jobs that took their worker down
+    count against max_attempts too.
+    """
+    def __init__(self, queue: JobQueue, handlers: dict, concurrency: int, max_attempts: int,
+                 backoff_base: float, poll_interval: float = 1.0, on_status=None):
+        self.queue = queue
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.poll_interval = poll_interval
+        self.on_status = on_status
+        self.tasks: list[asyncio.Task] = []
+
+
+    def start(self):
+        self.tasks = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+
+
+    async def stop(self):
+        # leased jobs are picked up again once their lease expires
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+
+    async def _run(self):
+        while True:
+            try:
+                job, exhausted = await asyncio.to_thread(self.queue.lease, self.max_attempts)
+            except sqlite3.Error as e:
+                print(f"Job lease failed: {e}")
+                job, exhausted = None, []
+            for expired in exhausted:
+                print(f"Job {expired.job_id} ({expired.kind}) failed for good: lease expired on attempt {expired.attempts}")
+                await self._status(expired, "failed")
+            if job is None:
+                await asyncio.sleep(self.poll_interval)
+                continue
+            await self._execute(job)
+
+
+    async def _execute(self, job: Job):
+        await self._status(job, "processing")
+        handler = asyncio.create_task(self.handlers[job.kind](job.payload))
+        heartbeat = asyncio.create_task(self._heartbeat(job, handler))
+        try:
+            await handler
+        except asyncio.CancelledError:
+            if not heartbeat.done() or heartbeat.cancelled():
+                raise
+            return  # lease lost, the job belongs to another worker now
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if job.attempts >= self.max_attempts:
+                print(f"Job {job.job_id} ({job.kind}) failed for good: {error}")
+                if await asyncio.to_thread(self.queue.fail, job, error):
+                    await self._status(job, "failed")
+                else:
+                    print(f"Job {job.job_id} ({job.kind}) lost its lease before it could be marked failed")
+            else:
+                delay = self.backoff_base * 2 ** (job.attempts - 1)
+                print(f"Job {job.job_id} ({job.kind}) attempt {job.attempts} failed, retrying in {delay}s: {error}")
+                if await asyncio.to_thread(self.queue.retry, job, delay, error):
+                    await self._status(job, "pending")
+                else:
+                    print(f"Job {job.job_id} ({job.kind}) lost its lease before it could be retried")
+            return
+        finally:
+            heartbeat.cancel()
+        if not await asyncio.to_thread(self.queue.complete, job):
+            print(f"Job {job.job_id} ({job.kind}) finished after its lease passed to another worker")
+
+
+    async def _heartbeat(self, job: Job, handler: asyncio.Task):
+        # keeps the lease while the handler runs; stops the handler if the lease was taken over
+        while True:
+            await asyncio.sleep(self.queue.visibility_timeout / 3)
+            try:
+                held = await asyncio.to_thread(self.queue.extend, job)
+            except sqlite3.Error as e:
+                print(f"Job {job.job_id} lease extension failed: {e}")
+                continue
+            if not held:
+                print(f"Job {job.job_id} ({job.kind}) lost its lease, stopping it")
+                handler.cancel()
+                return
+
+
+    async def _status(self, job: Job, status: str):
+        if self.on_status is None:
+            return
+        try:
+            await self.on_status(job, status)
+        except Exception as e:
+            print(f"Job {job.job_id} status update to {status} failed: {e}")
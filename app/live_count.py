@@ -0,0 +1,53 @@
+import asyncio
+
+
+class UserCountCache:
+    """
+    In-memory user count, seeded once and kept current from NOTIFY payloads
+    """
+    def __init__(self, pool, resync_seconds: int, on_change=None):
+        self.pool = pool
+        self.resync_seconds = resync_seconds
+        self.on_change = on_change
+        self.value: int | None = None
+        self.lock = asyncio.Lock()
+
+
+    async def get(self) -> int:
+        if self.value is None:
+            # clients that arrive together share one COUNT(*)
+            async with self.lock:
+                if self.value is None:
+                    await self.resync()
+        return self.value
+
+
+    async def set(self, count: int):
+        changed = count != self.value
+        self.value = count
+        if changed and self.on_change is not None:
+            await self.on_change(count)
+
+
+    async def apply(self, payload: str):
+        try:
+            count = int(payload)
+        except (TypeError, ValueError):
+            print(f"Unexpected user count payload: {payload!r}")
+            await self.resync()
+            return
+        await self.set(count)
+
+
+    async def resync(self):
+        count = await self.pool.fetchval('SELECT COUNT(*) FROM users')
+        await self.set(count)
+
+
+    async def resync_forever(self):
+        while True:
+            await asyncio.sleep(self.resync_seconds)
+            try:
+                await self.resync()
+            except Exception as e:
+                print(f"User count resync failed: {e}")
@@ -0,0 +1,59 @@
+import asyncio
+
+
+class ExtractionBatcher:
+    """
+    Gathers extraction requests for up to max_wait seconds or max_items
+    documents and sends them to the model as one request. extract is a
+    coroutine function taking {receipt_id: text} and returning
+    {receipt_id: items}.
+    """
+    def __init__(self, extract, max_items: int, max_wait: float):
+        self.extract = extract
+        self.max_items = max_items
+        self.max_wait = max_wait
+        self.pending: list[tuple[int, str, asyncio.Future]] = []
+        self.timer: asyncio.TimerHandle | None = None
+        self.tasks: set[asyncio.Task] = set()
+
+
+    async def submit(self, receipt_id: int, text: str):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((receipt_id, text, future))
+        if len(self.pending) >= self.max_items:
+            self._flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+
+    def _flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        task = asyncio.create_task(self._run(batch))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+
+    async def _run(self, batch):
+        try:
+            results = await self.extract({receipt_id: text for receipt_id, text, _ in batch})
+        except Exception as e:
+            # each job retries on its own
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for receipt_id, _, future in batch:
+            if future.done():
+                continue
+            if receipt_id in results:
+                future.set_result(results[receipt_id])
+            else:
+                future.set_exception(KeyError(f"No items returned for receipt {receipt_id}"))
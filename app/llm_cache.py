@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+
+class ExtractionCache:
+    """
+    On-disk cache of LLM extraction results, keyed by a hash of the OCR
+    text, model and prompt version. Entries expire after ttl_seconds and
+    the least recently used ones are evicted past max_bytes.
+    """
+    def __init__(self, path: str, ttl_seconds: float, max_bytes: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS extractions (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS extractions_lru ON extractions (accessed_at)"
+            )
+
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+
+    @staticmethod
+    def key(text: str, model: str, prompt_version: int) -> str:
+        return hashlib.sha256(f"{model}\0{prompt_version}\0{text}".encode()).hexdigest()
+
+
+    def get(self, key: str):
+        now = time.time()
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT value, created_at FROM extractions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, created_at = row
+            if now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM extractions WHERE key = ?", (key,))
+                self.expired += 1
+                self.misses += 1
+                return None
+            conn.execute("UPDATE extractions SET accessed_at = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return json.loads(value)
+
+
+    def put(self, key: str, value):
+        data = json.dumps(value)
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO extractions (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), now, now)
+            )
+            self._evict(conn, now)
+
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        conn.execute("DELETE FROM extractions WHERE created_at < ?", (now - self.ttl_seconds,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM extractions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute("SELECT key, size FROM extractions ORDER BY accessed_at").fetchall()
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM extractions WHERE key = ?", evicted)
+        self.evictions += len(evicted)
+
+
+    def stats(self) -> dict:
+        with closing(self._connect()) as conn:
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM extractions"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
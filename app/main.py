@@ -1,11 +1,16 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-import asyncpg
 from fastapi.middleware.cors import CORSMiddleware
 import asyncio
 import httpx
 from config import get_settings
+from database import supabase, pg_pool
 from api import api_router
+from live_count import UserCountCache
+from broadcaster import Broadcaster
+from relay import HostRelay
+from dependencies import get_receipt_event_bus, get_image_ingest, get_job_queue, get_receipt_processor, get_ocr_engine, get_ocr_service_client, get_token_cache
+from jobs import JobWorker
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
@@ -21,10 +26,23 @@ async def lifespan(app: FastAPI):
 
     app.state.http_client = httpx.AsyncClient()
     app.state.counter = 0
+
+    await pg_pool.open()
+    get_receipt_event_bus().attach(relay)
+    get_token_cache().attach(relay)
+    await relay.start()
     
     yield
     
+    await relay.stop()
+    await broadcaster.close()
+    get_image_ingest().shutdown()
+    if get_ocr_engine() is not None:
+        get_ocr_engine().shutdown()
+    await pg_pool.close()
     await app.state.http_client.aclose()
+    await get_ocr_service_client().aclose()
+    await supabase.postgrest.aclose()
 
 app = FastAPI(
     title= settings.PROJECT_NAME,
@@ -43,49 +61,83 @@ app.add_middleware(
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
-active_connections = set()
+broadcaster = Broadcaster(
+    queue_size=settings.WS_SEND_QUEUE_SIZE,
+    policy=settings.WS_BACKPRESSURE_POLICY,
+    send_timeout=settings.WS_SEND_TIMEOUT
+)
+
+async def publish_user_count(count):
+    relay.publish('user_count', count, retain=True)
 
-async def listen_for_user_count():
-    conn = await asyncpg.connect(settings.DATABASE_URL)
-    await conn.add_listener('user_count_channel', handle_user_count)
+user_count = UserCountCache(
+    pg_pool,
+    resync_seconds=settings.USER_COUNT_RESYNC_SECONDS,
+    on_change=publish_user_count
+)
+
+def on_user_count(count):
+    # runs in every worker, for counts from this worker or the leader
+    user_count.value = count
+    broadcaster.publish(str(count))
 
 async def handle_user_count(conn, pid, channel, payload):
-    for connection in active_connections:
-        try:
-            await connection.send_text(payload)
-        except Exception as e:
-            print(f"Failed to send to client: {e}")
-            active_connections.remove(connection)
+    await user_count.apply(payload)
+
+receipt_processor = get_receipt_processor()
+
+job_worker = JobWorker(
+    get_job_queue(),
+    handlers={"process_receipt": receipt_processor.run_job},
+    concurrency=settings.JOB_CONCURRENCY,
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    backoff_base=settings.JOB_BACKOFF_SECONDS,
+    on_status=receipt_processor.job_status
+)
+
+async def lead():
+    # only the relay leader listens, recounts and runs jobs; the rest of the host hears it over the relay
+    app.state.listener = await pg_pool.listen('user_count_channel', handle_user_count)
+    await user_count.resync()
+    app.state.resync_task = asyncio.create_task(user_count.resync_forever())
+    job_worker.start()
+
+async def step_down():
+    # also runs after a lead() that failed partway, so only undo what it got to
+    await job_worker.stop()
+    if getattr(app.state, 'listener', None) is not None:
+        await pg_pool.unlisten(app.state.listener, 'user_count_channel', handle_user_count)
+        app.state.listener = None
+    if getattr(app.state, 'resync_task', None) is not None:
+        app.state.resync_task.cancel()
+        app.state.resync_task = None
+
+relay = HostRelay(
+    settings.RELAY_SOCKET_PATH,
+    settings.RELAY_LOCK_PATH,
+    on_lead=lead,
+    on_step_down=step_down
+)
+relay.subscribe('user_count', on_user_count)
 
 @app.websocket("/ws/user-count")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
-    active_connections.add(websocket)
+    broadcaster.connect(websocket)
     print(f"New connection: {websocket.client}")
 
-    user_count = await get_user_count()
+    count = await user_count.get()
 
-    print(user_count)
-    await websocket.send_text(str(user_count))
+    print(count)
+    broadcaster.send(websocket, str(count))
 
     try:
         while True:
-            await asyncio.sleep(3600)  # Keeps the connection alive
+            await websocket.receive_text()  # Clients never send, this raises on disconnect
     except WebSocketDisconnect:
         print(f"Disconnected: {websocket.client}")
-        active_connections.remove(websocket)
-
-async def get_user_count():
-    conn = await asyncpg.connect(settings.PSQL_URL)
-    print(conn)
-    user_count = await conn.fetchval('SELECT COUNT(*) FROM users')
-    await conn.close()
-    return user_count
-
-@app.on_event("startup")
-async def user_startup():
-    asyncio.create_task(listen_for_user_count())
-
+    finally:
+        broadcaster.disconnect(websocket)
 
 @app.on_event("startup")
 def startup():
@@ -0,0 +1,245 @@
+import asyncio
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+import numpy as np
+import pytesseract
+
+
+MAX_DIMENSION = 2000
+
+
+def load(path: str):
+    image = cv2.imread(path)
+    if image is None:
+        raise FileNotFoundError(f"Image not found or unreadable: {path}")
+    return image
+
+
+def resize(image):
+    height, width = image.shape[:2]
+    if max(height, width) > MAX_DIMENSION:
+        scale = MAX_DIMENSION / max(height, width)
+        width = int(width * scale)
+        height = int(height * scale)
+        return cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+    return image
+
+
+def clahe(image):
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8)).apply(gray)
+
+
+def denoise_nlmeans(image):
+    return cv2.fastNlMeansDenoising(image)
+
+
+def denoise_nlmeans_half(image):
+    # non-local means on a half-size copy is ~4x cheaper; upscale the result back
+    height, width = image.shape[:2]
+    small = cv2.resize(image, (width // 2, height // 2), interpolation=cv2.INTER_AREA)
+    small = cv2.fastNlMeansDenoising(small)
+    return cv2.resize(small, (width, height), interpolation=cv2.INTER_LINEAR)
+
+
+def denoise_bilateral(image):
+    return cv2.bilateralFilter(image, 5, 50, 50)
+
+
+def denoise_median(image):
+    return cv2.medianBlur(image, 3)
+
+
+DENOISERS = {
+    "nlmeans": denoise_nlmeans,
+    "nlmeans_half": denoise_nlmeans_half,
+    "bilateral": denoise_bilateral,
+    "median": denoise_median,
+}
+
+
+DENOISE_PROFILES = {
+    "quality": "nlmeans",
+    "balanced": "bilateral",
+    "fast": "median",
+}
+
+
+def denoise(image, profile: str = "quality"):
+    return DENOISERS[DENOISE_PROFILES.get(profile, profile)](image)
+
+
+def enhance(image, profile: str = "quality"):
+    return denoise(clahe(image), profile)
+
+
+def threshold(image):
+    binary = cv2.adaptiveThreshold(
+        image,
+        255,
+        cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+        cv2.THRESH_BINARY,
+        21,  # block size
+        11   # C constant
+    )
+    kernel = np.ones((2,2), np.uint8)
+    return cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
+
+
+def deskew(image):
+    coords = np.column_stack(np.where(image > 0))
+
+    angle = cv2.minAreaRect(coords)[-1]
+
+    if angle < -45:
+        angle = 90 + angle
+
+    (h, w) = image.shape[:2]
+    center = (w // 2, h // 2)
+    M = cv2.getRotationMatrix2D(center, angle, 1.0)
+    return cv2.warpAffine(image, M, (w, h),
+                          flags=cv2.INTER_CUBIC,
+                          borderMode=cv2.BORDER_REPLICATE)
+
+
+def preprocess(image, profile: str = "quality"):
+    return threshold(enhance(resize(image), profile))
+
+
+def tesseract(image) -> str:
+    try:
+        return pytesseract.image_to_string(image)
+    except pytesseract.TesseractNotFoundError as e:
+        # the original does not unpickle, which would break the whole pool
+        raise RuntimeError(str(e)) from None
+
+
+def clean_text(text: str) -> str:
+    # keep one receipt line per line; the parser and the prompt both rely on it
+    lines = []
+    for line in text.split('\n'):
+        line = ' '.join(re.sub(r'[=|]', '', line).split())
+        if line:
+            lines.append(line)
+    return '\n'.join(lines)
+
+
+def recognize(path: str, profile: str = "quality") -> str:
+    return clean_text(tesseract(preprocess(load(path), profile)))
+
+
+def preprocess_path(path: str, profile: str = "quality"):
+    return preprocess(load(path), profile)
+
+
+def read_strip(image) -> list[str]:
+    text = clean_text(tesseract(image))
+    return text.split('\n') if text else []
+
+
+def row_ink(binary):
+    # text is black on white after threshold, so the gaps between lines are the rows with the least black
+    return (binary == 0).sum(axis=1)
+
+
+def quietest_row(ink, low: int, high: int) -> int:
+    low = max(0, min(low, len(ink) - 1))
+    high = max(low + 1, min(high, len(ink)))
+    return low + int(ink[low:high].argmin())
+
+
+def split_strips(binary, strips: int, overlap: int) -> list[tuple[int, int]]:
+    """
+    Row ranges for up to `strips` horizontal strips of a binarized image.
+    Each cut lands on the emptiest row near an even split point, and each
+    strip reaches past its cut by about `overlap` px (again ending on an
+    empty row) so a line that straddles a cut is read whole at least once.
+    """
+    height = binary.shape[0]
+    if strips <= 1:
+        return [(0, height)]
+
+    ink = row_ink(binary)
+    step = height // strips
+    cuts = [0]
+    for i in range(1, strips):
+        target = i * step
+        cuts.append(quietest_row(ink, target - step // 8, target + step // 8))
+    cuts.append(height)
+
+    bounds = []
+    for top, bottom in zip(cuts, cuts[1:]):
+        if top > 0:
+            top = quietest_row(ink, top - 2 * overlap, top - overlap)
+        if bottom < height:
+            bottom = quietest_row(ink, bottom + overlap, bottom + 2 * overlap) + 1
+        bounds.append((top, bottom))
+    return bounds
+
+
+def strip_count(height: int, workers: int, min_strip_height: int) -> int:
+    # one strip per worker, as long as each stays tall enough to hold a few whole lines
+    return max(1, min(workers, height // min_strip_height))
+
+
+def same_line(a: str, b: str) -> bool:
+    # exact only: "BANANA 0.19" and "BANANA 0.79" are two items, and keeping a
+    # misread duplicate is better than dropping one
+    return a.split() == b.split()
+
+
+def stitch(strips: list[list[str]]) -> list[str]:
+    # drop the lines a strip repeats from the end of the previous one
+    lines = []
+    for strip in strips:
+        longest = min(len(lines), len(strip))
+        for k in range(longest, 0, -1):
+            if all(same_line(a, b) for a, b in zip(lines[-k:], strip[:k])):
+                strip = strip[k:]
+                break
+        lines.extend(strip)
+    return lines
+
+
+def limit_threads():
+    # several tesseract processes run at once; keep each to one thread
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+
+class OcrEngine:
+    """
+    Runs the OpenCV + tesseract receipt pipeline in a process pool, in place
+    of the separate OCR service. profile picks the denoiser: a
+    DENOISE_PROFILES name or a DENOISERS key. A receipt is split into one
+    horizontal strip per worker, read in parallel, as long as each strip is
+    at least min_strip_height px; at MAX_DIMENSION and the default 100 px
+    that is up to 20 workers.
+    """
+    def __init__(self, workers: int, profile: str = "quality",
+                 min_strip_height: int = 100, strip_overlap: int = 40):
+        if profile not in DENOISE_PROFILES and profile not in DENOISERS:
+            raise ValueError(f"Unknown OCR denoise profile: {profile}")
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=limit_threads)
+        self.workers = workers
+        self.profile = profile
+        self.min_strip_height = min_strip_height
+        self.strip_overlap = strip_overlap
+
+
+    async def read(self, path: str) -> str:
+        loop = asyncio.get_running_loop()
+        binary = await loop.run_in_executor(self.pool, preprocess_path, path, self.profile)
+
+        strips = strip_count(binary.shape[0], self.workers, self.min_strip_height)
+        bounds = split_strips(binary, strips, self.strip_overlap)
+        texts = await asyncio.gather(*[
+            loop.run_in_executor(self.pool, read_strip, binary[top:bottom])
+            for top, bottom in bounds
+        ])
+        return '\n'.join(stitch(texts))
+
+
+    def shutdown(self):
+        self.pool.shutdown(cancel_futures=True)
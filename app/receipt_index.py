@@ -0,0 +1,81 @@
+import os
+import sqlite3
+from contextlib import closing
+from imaging import Fingerprint
+
+
+def to_signed(bits: int) -> int:
+    # SQLite integers are signed 64-bit
+    return bits - (1 << 64) if bits >= 1 << 63 else bits
+
+
+class ReceiptIndex:
+    """
+    Content hashes of stored receipt uploads, so a re-upload of the same
+    photo can reuse the earlier result. Exact matches go by sha256, near
+    matches (re-taken or re-compressed photos) by dHash Hamming distance.
+    A 64-bit dHash cannot tell apart two receipts from the same store, so
+    near matches are only candidates to be checked against the new OCR.
+    """
+    def __init__(self, path: str, max_distance: int):
+        self.path = path
+        self.max_distance = max_distance
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS receipt_hashes (
+                    receipt_id INTEGER PRIMARY KEY,
+                    user_id INTEGER NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    dhash INTEGER NOT NULL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS receipt_hashes_user ON receipt_hashes (user_id, sha256)"
+            )
+
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+
+    def add(self, receipt_id: int, user_id: int, fingerprint: Fingerprint):
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO receipt_hashes (receipt_id, user_id, sha256, dhash) VALUES (?, ?, ?, ?)",
+                (receipt_id, user_id, fingerprint.sha256, to_signed(fingerprint.dhash))
+            )
+
+
+    def remove(self, receipt_ids: list[int]):
+        with closing(self._connect()) as conn:
+            conn.executemany(
+                "DELETE FROM receipt_hashes WHERE receipt_id = ?",
+                [(receipt_id,) for receipt_id in receipt_ids]
+            )
+
+
+    def matches(self, user_id: int, fingerprint: Fingerprint) -> tuple[list[int], list[int]]:
+        """
+        Receipt ids of this user's uploads that look like the same photo:
+        the exact matches, newest first, and the near ones, nearest first
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT receipt_id, sha256, dhash FROM receipt_hashes WHERE user_id = ?",
+                (user_id,)
+            ).fetchall()
+
+        target = to_signed(fingerprint.dhash)
+        exact = []
+        near = []
+        for receipt_id, sha256, bits in rows:
+            if sha256 == fingerprint.sha256:
+                exact.append(receipt_id)
+                continue
+            distance = ((bits ^ target) & ((1 << 64) - 1)).bit_count()
+            if distance <= self.max_distance:
+                near.append((distance, -receipt_id))
+        return sorted(exact, reverse=True), [-receipt_id for _, receipt_id in sorted(near)]
+
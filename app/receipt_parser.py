@@ -0,0 +1,94 @@
+import re
+from typing import NamedTuple
+
+
+# a price at the end of a line, optionally followed by a tax flag (3.99 T)
+PRICE_LINE = re.compile(r"^(?P<text>.*?)\s*\$?\s?(?P<price>\d{1,5}[.,]\d{2})(?:\s+[A-Z]{1,2})?\s*$")
+QUANTITY = re.compile(r"^(?P<quantity>\d{1,2})\s+(?=\S*[A-Za-z])")
+
+SUMMARY = [
+    ("subtotal", re.compile(r"\bsub\s?-?total\b", re.I)),
+    ("tax", re.compile(r"\btax\b", re.I)),
+    ("tip", re.compile(r"\b(tip|gratuity|service charge)\b", re.I)),
+    ("total", re.compile(r"\b(total|amount due|balance due)\b", re.I)),
+]
+
+# priced lines that are neither items nor part of the bill
+IGNORED = re.compile(r"\b(cash|change|visa|mastercard|amex|debit|credit|card|tender|paid|savings|discount)\b", re.I)
+
+
+class ParsedReceipt(NamedTuple):
+    items: list[dict]
+    subtotal: float | None
+    tax: float | None
+    tip: float | None
+    total: float | None
+    confidence: float
+
+
+def close(a: float, b: float) -> bool:
+    return abs(a - b) < 0.015
+
+
+def confidence(items, subtotal, tax, tip, total, unparsed) -> float:
+    if not items:
+        return 0.0
+    score = 0.3
+    item_sum = sum(item["price"] for item in items)
+    if subtotal is not None:
+        if close(item_sum, subtotal):
+            score += 0.4
+    elif total is not None and close(item_sum + (tax or 0) + (tip or 0), total):
+        score += 0.4
+    if subtotal is not None and total is not None and close(subtotal + (tax or 0) + (tip or 0), total):
+        score += 0.2
+    if not unparsed:
+        score += 0.1
+    return round(score, 2)
+
+
+def parse_receipt(text: str) -> ParsedReceipt:
+    """
+    Rule-based pass over cleaned OCR lines: "NAME ... 3.99" lines are items,
+    and the summary lines (subtotal, tax, tip, total) are how the result is
+    checked. The confidence is high only when the items add up.
+    """
+    items = []
+    summary = {"subtotal": None, "tax": None, "tip": None, "total": None}
+    unparsed = 0
+    continues = False  # whether the next unpriced line can be the rest of an item name
+
+    for line in text.split("\n"):
+        match = PRICE_LINE.match(line)
+        if match is None:
+            # wrapped item names, but not modifiers like "-Mild"
+            if continues and items and re.match(r"^[A-Za-z(]", line):
+                items[-1]["name"] += " " + line
+            else:
+                continues = False
+            continue
+
+        label = match.group("text").strip(" .:$")
+        price = float(match.group("price").replace(",", "."))
+        continues = False
+
+        kind = next((kind for kind, pattern in SUMMARY if pattern.search(label)), None)
+        if kind is not None:
+            if summary[kind] is None:
+                summary[kind] = price
+            continue
+        if IGNORED.search(label) or summary["total"] is not None:
+            continue
+        if len(re.findall(r"[A-Za-z]", label)) < 2:
+            unparsed += 1
+            continue
+
+        label = QUANTITY.sub("", label)
+        items.append({"id": str(len(items) + 1), "name": label, "price": price, "people": []})
+        continues = True
+
+    return ParsedReceipt(
+        items=items,
+        confidence=confidence(items, unparsed=unparsed, **summary),
+        **summary
+    )
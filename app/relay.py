@@ -0,0 +1,206 @@
+import asyncio
+import fcntl
+import json
+import os
+from collections import defaultdict
+
+
+class HostRelay:
+    """
+    Shares broadcast messages between the workers on one host.
+
+    Whichever worker holds the lock file is the leader: it runs on_lead
+    (the Postgres LISTEN, count resync) and re-sends every message to the
+    other workers over a Unix socket. on_step_down undoes on_lead, also
+    after an on_lead that failed halfway; the worker then gives up the lock
+    and tries again. Followers forward what they publish to the leader and
+    take over if it goes away.
+    """
+    def __init__(self, socket_path: str, lock_path: str, on_lead=None, on_step_down=None,
+                 retry_seconds: float = 0.5, max_buffer: int = 1 << 20, max_pending: int = 1024):
+        self.socket_path = socket_path
+        self.lock_path = lock_path
+        self.on_lead = on_lead
+        self.on_step_down = on_step_down
+        self.retry_seconds = retry_seconds
+        self.max_buffer = max_buffer
+        self.is_leader = False
+        self.ready = asyncio.Event()
+        self.outbox = asyncio.Queue(maxsize=max_pending)
+        self.subscribers = defaultdict(list)
+        self.last = {}
+        self.followers = set()
+        self.leader_writer: asyncio.StreamWriter | None = None
+        self.lock_fd: int | None = None
+        self.server: asyncio.AbstractServer | None = None
+        self.task: asyncio.Task | None = None
+
+
+    def subscribe(self, channel: str, callback):
+        self.subscribers[channel].append(callback)
+
+
+    def publish(self, channel: str, payload, retain: bool = False):
+        # retained messages are replayed to workers that join later
+        message = {"channel": channel, "payload": payload, "retain": retain}
+        if self.is_leader or self.leader_writer is None:
+            self._deliver(message)
+        elif self.outbox.full():
+            print(f"Relay: leader is not reading, dropping {channel} message")
+        else:
+            self.outbox.put_nowait(message)
+
+
+    async def start(self, timeout: float = 5.0):
+        self.task = asyncio.create_task(self._run())
+        # wait for the election, so the first requests already see the leader's retained state
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            print("Relay: no leader yet, starting without one")
+
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+        if self.lock_fd is not None:
+            await self._step_down()
+
+
+    async def _run(self):
+        while True:
+            if self._try_lock():
+                if await self._lead():
+                    return
+                await asyncio.sleep(self.retry_seconds)
+                continue
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.socket_path)
+            except (FileNotFoundError, ConnectionRefusedError):
+                # leader is still starting up
+                await asyncio.sleep(self.retry_seconds)
+                continue
+
+            print(f"Relay: following leader on {self.socket_path}")
+            self.leader_writer = writer
+            forward = asyncio.create_task(self._forward(writer))
+            try:
+                while line := await reader.readline():
+                    message = json.loads(line)
+                    if message["channel"] is None:
+                        # the leader has replayed its retained messages
+                        self.ready.set()
+                    else:
+                        self._dispatch(message)
+            except ConnectionError:
+                pass
+            finally:
+                forward.cancel()
+                await asyncio.gather(forward, return_exceptions=True)
+                self.leader_writer = None
+                writer.close()
+            print("Relay: leader went away, re-electing")
+
+
+    def _try_lock(self) -> bool:
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self.lock_fd = fd
+        return True
+
+
+    async def _lead(self) -> bool:
+        try:
+            # the lock is ours, so any socket file left behind is stale
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            self.server = await asyncio.start_unix_server(self._serve_follower, path=self.socket_path)
+            print(f"Relay: leading on {self.socket_path} (pid {os.getpid()})")
+            if self.on_lead is not None:
+                await self.on_lead()
+        except Exception as e:
+            print(f"Relay: failed to take the lead, stepping down: {e}")
+            await self._step_down()
+            return False
+
+        self.is_leader = True
+        # what this worker published while it was still without a leader
+        while not self.outbox.empty():
+            self._deliver(self.outbox.get_nowait())
+        self.ready.set()
+        return True
+
+
+    async def _step_down(self):
+        self.is_leader = False
+        if self.on_step_down is not None:
+            try:
+                await self.on_step_down()
+            except Exception as e:
+                print(f"Relay: on_step_down failed: {e}")
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+        for writer in list(self.followers):
+            writer.close()
+        self.followers.clear()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        os.close(self.lock_fd)
+        self.lock_fd = None
+
+
+    async def _forward(self, writer):
+        # drain after each write so a leader that stops reading holds messages in the bounded outbox
+        while True:
+            message = await self.outbox.get()
+            writer.write(self._encode(message))
+            await writer.drain()
+
+
+    async def _serve_follower(self, reader, writer):
+        self.followers.add(writer)
+        # bring the new worker up to date, e.g. with the current user count
+        for message in self.last.values():
+            writer.write(self._encode(message))
+        writer.write(self._encode({"channel": None, "payload": None, "retain": False}))
+        try:
+            while line := await reader.readline():
+                self._deliver(json.loads(line))
+        except (ConnectionError, asyncio.CancelledError):
+            # cancelled on shutdown; nothing awaits this handler task
+            pass
+        finally:
+            self.followers.discard(writer)
+            writer.close()
+
+
+    def _deliver(self, message: dict):
+        if message["retain"]:
+            self.last[message["channel"]] = message
+        data = self._encode(message)
+        for writer in list(self.followers):
+            if writer.transport.get_write_buffer_size() > self.max_buffer:
+                print("Relay: dropping unresponsive follower")
+                self.followers.discard(writer)
+                writer.close()
+                continue
+            writer.write(data)
+        self._dispatch(message)
+
+
+    def _dispatch(self, message: dict):
+        for callback in self.subscribers.get(message["channel"], ()):
+            try:
+                callback(message["payload"])
+            except Exception as e:
+                print(f"Relay subscriber failed on {message['channel']}: {e}")
+
+
+    def _encode(self, message: dict) -> bytes:
+        return json.dumps(message).encode() + b"\n"
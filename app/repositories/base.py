@@ -1,6 +1,6 @@
 from typing import Generic, TypeVar, Dict, List, Optional
 from fastapi import HTTPException
-from database import Client
+from database import AsyncClient
 
 ModelType = TypeVar("ModelType", bound=dict)
 CreateSchemaType = TypeVar("CreateSchemaType")
@@ -10,7 +10,7 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     """
     Base Repo for CRUB ops
     """
-    def __init__(self, client: Client, table_name: str, pk: str = "id"):
+    def __init__(self, client: AsyncClient, table_name: str, pk: str = "id"):
         self.db = client
         self.table_name = table_name
         self.pk = pk
@@ -18,7 +18,7 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     
     async def create(self, data: CreateSchemaType) -> ModelType:
         try:
-            response = (
+            response = await (
                 self.db.table(self.table_name)\
                     .insert(data.model_dump())\
                     .execute()
@@ -30,7 +30,7 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     
     async def get(self, id: int) -> Optional[ModelType]:
         try:
-            response = (
+            response = await (
                 self.db.table(self.table_name)
                     .select("*")
                     .eq(self.pk, id)
@@ -43,7 +43,7 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     
     async def get_all(self) -> List[ModelType]:
         try:
-            response = (
+            response = await (
                 self.db.table(self.table_name)
                     .select("*")
                     .execute()
@@ -55,7 +55,7 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         
     async def update(self, id: int, schema: UpdateSchemaType) -> ModelType:
         try:
-            response = (
+            response = await (
                 self.db.table(self.table_name)
                 .update(schema.model_dump(exclude_unset=True))
                 .eq(self.pk, id)
@@ -74,7 +74,7 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         
     async def delete(self, id: int) -> bool:
         try:
-            response = (
+            response = await (
                 self.db.table(self.table_name)
                     .delete()
                     .eq(self.pk, id)
@@ -10,7 +10,7 @@ class FriendRepository(BaseRepository[dict, CreateFriend, UpdateFriend]):
 
     async def get_by_user(self, user_id: int):
         try:
-            response = (
+            response = await (
                 self.db.table(self.table_name)
                     .select("*")
                     .or_(f"user_1.eq.{user_id}, user_2.eq.{user_id}")
@@ -9,7 +9,7 @@ class ReceiptRepository(BaseRepository[dict, ReceiptCreate, ReceiptUpdate]):
 
     async def get_by_path(self, filepath: str): 
         try:
-            response = (
+            response = await (
                 self.db.table(self.table_name)
                     .select("*")
                     .eq("filepath", filepath)
@@ -22,4 +22,18 @@ class ReceiptRepository(BaseRepository[dict, ReceiptCreate, ReceiptUpdate]):
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
 
+    async def get_many(self, receipt_ids: list[int]) -> list[dict]:
+        # ids with no row are left out rather than raising like get()
+        try:
+            response = await (
+                self.db.table(self.table_name)
+                    .select("*")
+                    .in_("receipt_id", receipt_ids)
+                    .execute()
+            )
+            return response.data
+
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
 
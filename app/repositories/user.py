@@ -4,13 +4,21 @@ from schemas import UserCreate, UserUpdate
 from database import supabase
 
 class UserRepository(BaseRepository[dict, UserCreate, UserUpdate]):
-    def __init__(self):
+    def __init__(self, token_cache=None):
         super().__init__(supabase, "users", pk="user_id")
+        self.token_cache = token_cache
+
+    async def update(self, id: int, schema: UserUpdate):
+        user = await super().update(id, schema)
+        # cached logins hold the old record
+        if self.token_cache is not None:
+            self.token_cache.invalidate_user(id)
+        return user
 
     async def get_by_query(self, query: str):
         try:
             search_pattern = f"%{query}%"
-            response = (
+            response = await (
                 self.db.table(self.table_name)
                 .select("*")
                 .or_(f"name.ilike.{search_pattern},username.ilike.{search_pattern}")
@@ -26,7 +34,7 @@ class UserRepository(BaseRepository[dict, UserCreate, UserUpdate]):
 
     async def get_by_email(self, email: str):
         try:
-            response = (
+            response = await (
                 self.db.table(self.table_name)
                     .select("*")
                     .eq("email", email)
@@ -42,7 +50,7 @@ class UserRepository(BaseRepository[dict, UserCreate, UserUpdate]):
         
     async def get_by_username(self, username: str):
         try:
-            response = (
+            response = await (
                 self.db.table(self.table_name)
                     .select("*")
                     .eq("username", username)
@@ -60,7 +68,7 @@ class UserRepository(BaseRepository[dict, UserCreate, UserUpdate]):
         
     async def get_by_phone(self, phone: str):
         try:
-            response = (
+            response = await (
                 self.db.table(self.table_name)
                     .select("*")
                     .eq("phone", phone)
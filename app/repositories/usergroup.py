@@ -8,7 +8,7 @@ class UGRepository(BaseRepository[dict, CreateUG, UpdateUG]):
 
     async def delete_by_user_group(self, user_id: int, group_id: int):
         try:
-            response = (
+            response = await (
                 self.db.table(self.table_name)
                 .delete()
                 .eq("user_id", user_id)
@@ -11,6 +11,7 @@ class ReceiptCreate(BaseModel):
     user_id: int 
     filepath: str
     status: str
+    processed_data: Dict[str, Any] | None = None
 
 
 class ReceiptUpdate(BaseModel):
@@ -26,6 +27,21 @@ class Item(BaseModel):
     totalPrice: float
 
 
+class ExtractedItem(BaseModel):
+    id: str | int
+    name: str
+    price: float
+    people: List[Any] = []
+
+
+class PartialReceipt(BaseModel):
+    # pushed on the receipt event bus while items are still being extracted
+    receipt_id: int
+    status: str = "processing"
+    partial: bool = True
+    processed_data: Dict[str, List[ExtractedItem]]
+
+
 class PersonSplit(BaseModel):
     name: str
     id: Optional[str | int]
@@ -3,3 +3,4 @@ from .auth import *
 from .user import *
 from .split import *
 from .group import *
+from .events import *
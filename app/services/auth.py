@@ -9,14 +9,15 @@ from typing import Dict, Optional
 from jwt import algorithms
 from passlib.context import CryptContext
 from schemas import UserInDB, User, UserCreate, TokenData, UserBase
-from config import settings
 
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 class AuthService:
-    def __init__(self, repository):
+    def __init__(self, repository, tokens, token_cache=None):
         self.repository = repository
+        self.tokens = tokens
+        self.token_cache = token_cache
     
     
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
@@ -34,12 +35,7 @@ class AuthService:
         else:
             expire = datetime.now(timezone.utc) + timedelta(minutes=15)
         to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(
-            to_encode, 
-            settings.SECRET_KEY, 
-            algorithm=settings.ALGORITHM
-        )
-        return encoded_jwt
+        return self.tokens.access.encode(to_encode)
 
 
     def create_refresh_token(self, data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -49,12 +45,7 @@ class AuthService:
         else:
             expire = datetime.now(timezone.utc) + timedelta(minutes=15)
         to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(
-            to_encode, 
-            settings.REFRESH_SECRET_KEY, 
-            algorithm=settings.ALGORITHM
-        )
-        return encoded_jwt
+        return self.tokens.refresh.encode(to_encode)
     
     
     async def get_user(self, username: str) -> Optional[UserInDB]:
@@ -84,7 +75,7 @@ class AuthService:
                 
     async def verify_register_token(self, token: str, phone_number: str) -> Optional[bool]:
         try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+            payload = self.tokens.access.decode(token)
             payload_number: str = payload.get("phone_number")
             if phone_number != payload_number:
                 return False 
@@ -93,20 +84,27 @@ class AuthService:
             return None
             
     async def verify_token(self, token: str) -> Optional[UserInDB]:
+        if self.token_cache is not None:
+            user = self.token_cache.get(token)
+            if user is not None:
+                return user
         try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+            payload = self.tokens.access.decode(token)
             username: str = payload.get("sub")
             if username is None:
                 return None
             token_data = TokenData(username=username)
-            return await self.repository.get_by_username(token_data.username)
+            user = await self.repository.get_by_username(token_data.username)
+            if user is not None and self.token_cache is not None:
+                self.token_cache.put(token, user, payload["exp"])
+            return user
         except jwt.InvalidTokenError:
             return None
         
     
     async def verify_refresh_token(self, token: str) -> Optional[UserInDB]:
         try:
-            payload = jwt.decode(token, settings.REFRESH_SECRET_KEY, algorithms=[settings.ALGORITHM])
+            payload = self.tokens.refresh.decode(token)
             print("Token Payload:", payload)
             username: str = payload.get("sub")
             if username is None:
@@ -0,0 +1,53 @@
+import asyncio
+from collections import defaultdict
+from typing import Dict, Set
+
+
+class ReceiptEventBus:
+    """
+    In-process fan-out of receipt status changes to websocket subscribers
+    """
+    def __init__(self, queue_size: int = 8):
+        self.queue_size = queue_size
+        self.subscribers: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+        self.relay = None
+
+
+    def attach(self, relay):
+        # route events through the host relay so subscribers on other workers hear them
+        self.relay = relay
+        relay.subscribe(
+            "receipt_events",
+            lambda message: self.notify(message["receipt_id"], message["event"])
+        )
+
+
+    def subscribe(self, receipt_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers[receipt_id].add(queue)
+        return queue
+
+
+    def unsubscribe(self, receipt_id: int, queue: asyncio.Queue):
+        queues = self.subscribers.get(receipt_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self.subscribers[receipt_id]
+
+
+    def publish(self, receipt_id: int, event: dict):
+        if self.relay is None:
+            self.notify(receipt_id, event)
+        else:
+            self.relay.publish("receipt_events", {"receipt_id": receipt_id, "event": event})
+
+
+    def notify(self, receipt_id: int, event: dict):
+        for queue in list(self.subscribers.get(receipt_id, ())):
+            if queue.full():
+                # a subscriber only cares about the latest status
+                queue.get_nowait()
+            queue.put_nowait(event)
+
@@ -4,23 +4,63 @@ import base64
 import json
 import asyncio
 import uuid
-import requests
 from datetime import datetime
 from openai import OpenAI
-from PIL import Image, ExifTags
-import numpy as np
 from dotenv import load_dotenv
-from schemas import ReceiptCreate, ReceiptUpdate
-import pytesseract
-import cv2
-from io import BytesIO
+from pydantic import ValidationError
+from schemas import ReceiptCreate, ReceiptUpdate, ExtractedItem, PartialReceipt
+from config import settings
+from llm_batch import ExtractionBatcher
+from item_stream import ItemStreamParser
+from receipt_parser import parse_receipt, close
 
 load_dotenv()
 
+
+# bump when RECEIPT_PROMPT changes so cached extractions from the old prompt are not reused
+RECEIPT_PROMPT_VERSION = 2
+
+RECEIPT_PROMPT = """
+The following are texts extracted from {count} receipts, each introduced by its receipt id. For every receipt, extract the items and prices and return a JSON object with this structure:
+
+{{
+    "receipts": {{
+        "<receipt_id>": {{
+            "items": [
+                {{
+                    "id": "<unique_id>",
+                    "name": "<item_name>",
+                    "price": <price>,
+                    "people": []
+                }},
+                ...
+            ]
+        }},
+        ...
+    }}
+}}
+
+Use an incrementing numeric ID for the items of each receipt, starting from 1. Ensure the names and prices are accurate and never mix items between receipts.
+
+{documents}
+"""
+
 class ReceiptProcessor:
-    def __init__(self, repository) -> None:
+    def __init__(self, repository, events, images, jobs, index, cache, http, ocr=None) -> None:
         self.client = OpenAI()
         self.repository = repository 
+        self.events = events
+        self.images = images
+        self.jobs = jobs
+        self.index = index
+        self.cache = cache
+        self.http = http
+        self.batcher = ExtractionBatcher(
+            self.extract_batch,
+            max_items=settings.LLM_BATCH_MAX_ITEMS,
+            max_wait=settings.LLM_BATCH_MAX_WAIT_MS / 1000
+        )
+        self.ocr = ocr
         self.pwd = os.path.join(
             os.path.dirname(
                 os.path.dirname(os.path.dirname(__file__))
@@ -32,140 +72,179 @@ class ReceiptProcessor:
     def create_filepath(self, user_id):
         timestamp = datetime.now().strftime('%Y%m%d')
         unique_id = str(uuid.uuid4())
-        extension = "png"
+        extension = self.images.extension("receipt")
 
         return f"{user_id}_{timestamp}_{unique_id}.{extension}"
 
 
-    async def standardize(self, image_data):
-        content = await image_data.read()
-
-        image = Image.open(BytesIO(content))
-     
-        try:
-            for orientation in ExifTags.TAGS.keys():
-                if ExifTags.TAGS[orientation] == 'Orientation':
-                    break
-
-            exif = image._getexif()
-            if exif is not None:
-                if orientation in exif:
-                    if exif[orientation] == 3:
-                        image = image.rotate(180, expand=True)
-                    elif exif[orientation] == 6:
-                        image = image.rotate(270, expand=True)
-                    elif exif[orientation] == 8:
-                        image = image.rotate(90, expand=True)
-
-        except (AttributeError, KeyError, IndexError, TypeError):
-            pass       
-
-        if image.mode != "RGB":
-            image = image.convert("RGB")
-        
-        output_buffer = BytesIO()
-        image.save(output_buffer, format='PNG')
-
-        return output_buffer.getvalue()
-
-
     async def save_image(self, image_data, filepath):
-        try:
-            img = Image.open(BytesIO(image_data))
-            await asyncio.to_thread(img.save, filepath)
-        except Exception as e:
-            print(f'Error saving image: {e}')
+        path = self.pwd + filepath
+        return await self.images.save(image_data, "receipt", path)
 
 
     async def upload(self, data):
         return await self.repository.create(ReceiptCreate(**data))
 
 
-    def resize(self, image):
-        max_dimension = 2000
-        height, width = image.shape[:2]
-        if max(height, width) > max_dimension:
-            scale = max_dimension / max(height, width)
-            width = int(width * scale)
-            height = int(height * scale)
-            return cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
-        return image
-
-    
-    def enhance(self, image):
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-        enhanced = clahe.apply(gray)
-        denoised = cv2.fastNlMeansDenoising(enhanced)
-        return denoised
-
-
-    def threshold(self, image):
-        binary = cv2.adaptiveThreshold(
-            image, 
-            255, 
-            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-            cv2.THRESH_BINARY, 
-            21,  # block size
-            11   # C constant
+    async def fetch_receipts(self, receipt_ids):
+        # one query for all index matches; ids of deleted receipts leave the index
+        if not receipt_ids:
+            return []
+        found = {receipt["receipt_id"]: receipt for receipt in await self.repository.get_many(receipt_ids)}
+        stale = [receipt_id for receipt_id in receipt_ids if receipt_id not in found]
+        if stale:
+            await asyncio.to_thread(self.index.remove, stale)
+        return [found[receipt_id] for receipt_id in receipt_ids if receipt_id in found]
+
+
+    async def find_duplicate(self, user_id, fingerprint):
+        """
+        The newest earlier upload of this exact photo that already has a
+        result, and the ids of finished uploads that only look alike, to be
+        checked against this receipt's OCR before anything is reused
+        """
+        exact, near = await asyncio.to_thread(self.index.matches, user_id, fingerprint)
+        completed = [
+            receipt for receipt in await self.fetch_receipts(exact + near)
+            if receipt["status"] == "completed" and receipt["processed_data"]
+        ]
+        duplicate = next((receipt for receipt in completed if receipt["receipt_id"] in exact), None)
+        similar = [receipt["receipt_id"] for receipt in completed if receipt["receipt_id"] not in exact]
+        return duplicate, similar
+
+
+    async def similar_items(self, receipt_ids, parsed):
+        # a look-alike upload is reused only when its items add up to the subtotal read off this photo
+        subtotal = parsed.subtotal
+        if subtotal is None and parsed.total is not None:
+            subtotal = parsed.total - (parsed.tax or 0) - (parsed.tip or 0)
+        if subtotal is None or not receipt_ids:
+            return None
+        for receipt in await self.fetch_receipts(list(receipt_ids)):
+            items = (receipt["processed_data"] or {}).get("items")
+            try:
+                if items and close(sum(float(item["price"]) for item in items), subtotal):
+                    return items
+            except (KeyError, TypeError, ValueError):
+                continue
+        return None
+
+
+    async def add_to_index(self, receipt, fingerprint):
+        await asyncio.to_thread(self.index.add, receipt["receipt_id"], receipt["user_id"], fingerprint)
+
+
+    def extract_items(self, documents, on_item=None):
+        # one request for a whole batch of receipts, {receipt_id: text} -> {receipt_id: items};
+        # on_item(receipt_id, item) sees each item as soon as it is streamed
+        texts = "\n\n".join(
+            f"Receipt {receipt_id}:\n{text}" for receipt_id, text in documents.items()
+        )
+        completion = self.client.chat.completions.create(
+            model=settings.RECEIPT_MODEL,
+            response_format={"type": "json_object"},
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You are an assistant that formats receipt data into a structured format for a food-sharing app."
+                },
+                {
+                    "role": "user",
+                    "content": RECEIPT_PROMPT.format(count=len(documents), documents=texts)
+                }
+            ],
+            max_tokens=1000 * len(documents),
+            stream=True
         )
-        kernel = np.ones((2,2), np.uint8)
-        cleaned = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
-    
-        return cleaned
-
-
-    def deskew(self, image):
-        coords = np.column_stack(np.where(image > 0))
 
-        angle = cv2.minAreaRect(coords)[-1]
+        parser = ItemStreamParser()
+        chunks = []
+        for chunk in completion:
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            chunks.append(chunk.choices[0].delta.content)
+            for receipt_id, item in parser.feed(chunks[-1]):
+                if on_item is not None:
+                    on_item(receipt_id, item)
 
-        if angle < -45:
-            angle = 90 + angle
+        receipts = json.loads("".join(chunks))["receipts"]
+        return {int(receipt_id): receipt["items"] for receipt_id, receipt in receipts.items()}
 
-        (h, w) = image.shape[:2]
-        center = (w // 2, h // 2)
-        M = cv2.getRotationMatrix2D(center, angle, 1.0)
-        rotated = cv2.warpAffine(image, M, (w, h),
-                                 flags=cv2.INTER_CUBIC,
-                                 borderMode=cv2.BORDER_REPLICATE)
-        return rotated
 
+    async def extract_batch(self, documents):
+        loop = asyncio.get_running_loop()
+        partial = {receipt_id: [] for receipt_id in documents}
 
-    def preprocess(self, image):
-        resized = self.resize(image)
+        def on_item(receipt_id, item):
+            loop.call_soon_threadsafe(self.publish_partial, receipt_id, item, partial)
 
-        enhanced = self.enhance(resized)
+        return await asyncio.to_thread(self.extract_items, documents, on_item)
 
-        binary = self.threshold(enhanced)
 
-        return binary
+    def publish_partial(self, receipt_id, item, partial):
+        if receipt_id not in partial:
+            return
+        try:
+            partial[receipt_id].append(ExtractedItem(**item))
+        except ValidationError:
+            return
+        # the whole list so far, so a subscriber that only keeps the latest event misses nothing
+        event = PartialReceipt(receipt_id=receipt_id, processed_data={"items": partial[receipt_id]})
+        self.events.publish(receipt_id, event.model_dump())
+
+
+    async def extract_items_cached(self, receipt_id, text):
+        key = self.cache.key(text, settings.RECEIPT_MODEL, RECEIPT_PROMPT_VERSION)
+        items = await asyncio.to_thread(self.cache.get, key)
+        if items is None:
+            items = await self.batcher.submit(receipt_id, text)
+            await asyncio.to_thread(self.cache.put, key, items)
+        return items
+
+
+    async def process_local(self, receipt_id, filepath, similar=()):
+        text = await self.ocr.read(self.pwd + filepath)
+        parsed = parse_receipt(text)
+        if parsed.confidence >= settings.RECEIPT_PARSER_MIN_CONFIDENCE:
+            # the lines add up to the printed totals, no need to ask the model
+            items = parsed.items
+        else:
+            items = await self.similar_items(similar, parsed)
+            if items is None:
+                items = await self.extract_items_cached(receipt_id, text)
+        await self.repository.update(
+            receipt_id,
+            ReceiptUpdate(status="completed", processed_data={"items": items})
+        )
 
-    def clean_text(self, text):
-        text = ' '.join(text.split())
-    
-        text = re.sub(r'[=|]', '', text)
-        text = re.sub(r'\s+', ' ', text)
-    
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-    
-        cleaned_text = '\n'.join(lines)
-    
-        return cleaned_text
 
-    def process(self, receipt_id, image_path):
-        url = "http://0.0.0.0:8001/gpt"
+    async def process(self, receipt_id, image_path):
         payload = {
             "receipt_id": receipt_id,
             "path": image_path
         }
         print("fetching second process")
-        x = requests.post(url, json=payload)
-
-    async def save_and_process(self, png, filepath):
-        path = self.pwd + filepath
-        await self.save_image(png, path)
-
-        receipt = await self.repository.get_by_path(filepath)
-        print(receipt)
-        asyncio.create_task(asyncio.to_thread(self.process, receipt["receipt_id"], filepath))
+        response = await self.http.post("/gpt", json=payload)
+        response.raise_for_status()
+
+    async def run_job(self, payload):
+        receipt_id = payload["receipt_id"]
+        if self.ocr is None:
+            await self.process(receipt_id, payload["filepath"])
+        else:
+            await self.process_local(receipt_id, payload["filepath"], payload.get("similar", ()))
+
+        receipt = await self.repository.get(receipt_id)
+        self.events.publish(receipt_id, receipt)
+
+    async def job_status(self, job, status):
+        receipt_id = job.payload["receipt_id"]
+        receipt = await self.repository.update(receipt_id, ReceiptUpdate(status=status))
+        self.events.publish(receipt_id, receipt)
+
+    async def start_processing(self, receipt_id, filepath, similar=()):
+        await asyncio.to_thread(
+            self.jobs.enqueue,
+            "process_receipt",
+            {"receipt_id": receipt_id, "filepath": filepath, "similar": list(similar)}
+        )
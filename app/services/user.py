@@ -4,14 +4,13 @@ from typing import Optional, List
 from pydantic import BaseModel
 from fastapi import HTTPException
 from schemas import UserInDB, UserCreate, GetFriends
-from PIL import Image, ExifTags
-from io import BytesIO
 from datetime import datetime
 import uuid
 
 class UserService:
-    def __init__(self, repository, auth, friend_repo):
+    def __init__(self, repository, auth, friend_repo, images):
         self.repository = repository
+        self.images = images
         self.auth_service = auth
         self.friend_repo = friend_repo
         self.pwd = os.path.join(
@@ -21,52 +20,17 @@ class UserService:
             "storage/pfp/"
         )
     
-    async def standardize(self, image_data):
-        content = await image_data.read()
-
-        image = Image.open(BytesIO(content))
-     
-        try:
-            for orientation in ExifTags.TAGS.keys():
-                if ExifTags.TAGS[orientation] == 'Orientation':
-                    break
-
-            exif = image._getexif()
-            if exif is not None:
-                if orientation in exif:
-                    if exif[orientation] == 3:
-                        image = image.rotate(180, expand=True)
-                    elif exif[orientation] == 6:
-                        image = image.rotate(270, expand=True)
-                    elif exif[orientation] == 8:
-                        image = image.rotate(90, expand=True)
-
-        except (AttributeError, KeyError, IndexError, TypeError):
-            pass       
-
-        if image.mode != "RGB":
-            image = image.convert("RGB")
-        
-        output_buffer = BytesIO()
-        image.save(output_buffer, format='PNG')
-
-        return output_buffer.getvalue()
-
     def create_pfp_filepath(self):
         timestamp = datetime.now().strftime('%Y%m%d')
         unique_id = str(uuid.uuid4())
-        extension = "png"
+        extension = self.images.extension("pfp")
 
         return f"{timestamp}_{unique_id}.{extension}"
 
 
     async def save_image(self, image_data, filepath):
-        try:
-            path = self.pwd + filepath;
-            img = Image.open(BytesIO(image_data))
-            await asyncio.to_thread(img.save, path)
-        except Exception as e:
-            print(f'Error saving image: {e}')
+        path = self.pwd + filepath
+        await self.images.save(image_data, "pfp", path)
 
 
     async def get_all_users(self) -> List[UserInDB]:
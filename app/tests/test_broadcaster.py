@@ -0,0 +1,139 @@
+import asyncio
+import pytest
+from broadcaster import Broadcaster, COALESCE, DROP_SLOWEST
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeWebSocket:
+    def __init__(self, blocked=False, fail=False):
+        self.client = ("127.0.0.1", id(self))
+        self.received = []
+        self.closed = False
+        self.fail = fail
+        self.gate = asyncio.Event()
+        if not blocked:
+            self.gate.set()
+
+    async def send_text(self, message):
+        await self.gate.wait()
+        if self.fail:
+            raise ConnectionError("gone")
+        self.received.append(message)
+
+    async def close(self):
+        self.closed = True
+
+
+async def settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+async def test_publish_reaches_every_client():
+    hub = Broadcaster()
+    clients = [FakeWebSocket() for _ in range(3)]
+    for client in clients:
+        hub.connect(client)
+
+    hub.publish("1")
+    hub.publish("2")
+    await settle()
+
+    assert [client.received for client in clients] == [["1", "2"]] * 3
+    await hub.close()
+
+
+async def test_send_reaches_only_that_client():
+    hub = Broadcaster()
+    first, second = FakeWebSocket(), FakeWebSocket()
+    hub.connect(first)
+    hub.connect(second)
+
+    hub.send(first, "42")
+    await settle()
+
+    assert first.received == ["42"]
+    assert second.received == []
+    await hub.close()
+
+
+async def test_coalesce_keeps_only_the_newest_for_a_slow_client():
+    hub = Broadcaster(queue_size=2, policy=COALESCE)
+    slow, fast = FakeWebSocket(blocked=True), FakeWebSocket()
+    hub.connect(slow)
+    hub.connect(fast)
+    await settle()
+
+    for count in range(1, 6):
+        hub.publish(str(count))
+        await settle()
+    assert fast.received == ["1", "2", "3", "4", "5"]
+
+    slow.gate.set()
+    await settle()
+    # "1" was already being sent; "4" found the queue full and replaced "2" and "3"
+    assert slow.received == ["1", "4", "5"]
+    assert len(hub) == 2
+    await hub.close()
+
+
+async def test_drop_slowest_closes_a_client_whose_queue_is_full():
+    hub = Broadcaster(queue_size=1, policy=DROP_SLOWEST)
+    slow, fast = FakeWebSocket(blocked=True), FakeWebSocket()
+    hub.connect(slow)
+    hub.connect(fast)
+    await settle()
+
+    for count in range(3):
+        hub.publish(str(count))
+        if count < 2:
+            await settle()
+    assert len(hub) == 1
+    assert len(hub.closing) == 1
+
+    await settle()
+    assert slow.closed
+    assert not hub.closing
+    assert fast.received == ["0", "1", "2"]
+    await hub.close()
+
+
+async def test_failed_send_disconnects_the_client():
+    hub = Broadcaster()
+    broken = FakeWebSocket(fail=True)
+    hub.connect(broken)
+
+    hub.publish("1")
+    await settle()
+
+    assert len(hub) == 0
+    assert broken.closed
+
+
+async def test_send_timeout_disconnects_the_client():
+    hub = Broadcaster(send_timeout=0.01)
+    stuck = FakeWebSocket(blocked=True)
+    hub.connect(stuck)
+
+    hub.publish("1")
+    await asyncio.sleep(0.05)
+
+    assert len(hub) == 0
+    assert stuck.closed
+
+
+async def test_close_cancels_every_send_loop():
+    hub = Broadcaster()
+    subscriber = hub.connect(FakeWebSocket(blocked=True))
+    hub.publish("1")
+
+    await hub.close()
+
+    assert len(hub) == 0
+    assert subscriber.task.cancelled()
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        Broadcaster(policy="newest")
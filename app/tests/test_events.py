@@ -0,0 +1,61 @@
+from services.events import ReceiptEventBus
+
+
+class RecordingRelay:
+    def __init__(self):
+        self.subscribers = {}
+        self.published = []
+
+    def subscribe(self, channel, callback):
+        self.subscribers[channel] = callback
+
+    def publish(self, channel, payload, retain=False):
+        self.published.append((channel, payload))
+        self.subscribers[channel](payload)
+
+
+def test_subscribers_of_a_receipt_get_its_events():
+    bus = ReceiptEventBus()
+    first = bus.subscribe(1)
+    second = bus.subscribe(1)
+    other = bus.subscribe(2)
+
+    bus.publish(1, {"status": "completed"})
+
+    assert first.get_nowait() == {"status": "completed"}
+    assert second.get_nowait() == {"status": "completed"}
+    assert other.empty()
+
+
+def test_full_queue_keeps_the_latest_event():
+    bus = ReceiptEventBus(queue_size=2)
+    queue = bus.subscribe(1)
+
+    for status in ("pending", "processing", "completed"):
+        bus.publish(1, {"status": status})
+
+    assert [queue.get_nowait()["status"] for _ in range(queue.qsize())] == ["processing", "completed"]
+
+
+def test_unsubscribe_forgets_the_receipt():
+    bus = ReceiptEventBus()
+    queue = bus.subscribe(1)
+
+    bus.unsubscribe(1, queue)
+    bus.unsubscribe(1, queue)
+    bus.publish(1, {"status": "completed"})
+
+    assert 1 not in bus.subscribers
+    assert queue.empty()
+
+
+def test_attached_bus_publishes_through_the_relay():
+    relay = RecordingRelay()
+    bus = ReceiptEventBus()
+    bus.attach(relay)
+    queue = bus.subscribe(7)
+
+    bus.publish(7, {"status": "failed"})
+
+    assert relay.published == [("receipt_events", {"receipt_id": 7, "event": {"status": "failed"}})]
+    assert queue.get_nowait() == {"status": "failed"}
@@ -0,0 +1,66 @@
+from image_cache import CachedImage, HotImageCache
+
+
+def image(size, mtime_ns=1):
+    return CachedImage(b"x" * size, "image/png", {"ETag": '"tag"'}, mtime_ns)
+
+
+def test_hit_returns_the_stored_entry():
+    cache = HotImageCache(max_bytes=1000, max_item_bytes=100)
+    entry = image(10)
+    cache.put("pfp", "a.png", None, None, entry)
+
+    assert cache.get("pfp", "a.png", None, None, 1) is entry
+    assert cache.get("pfp", "a.png", 64, 64, 1) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_changed_original_is_a_miss_and_drops_the_entry():
+    cache = HotImageCache(max_bytes=1000, max_item_bytes=100)
+    cache.put("pfp", "a.png", None, None, image(10, mtime_ns=1))
+
+    assert cache.get("pfp", "a.png", None, None, 2) is None
+    assert cache.stats()["entries"] == 0
+    assert cache.total_bytes == 0
+
+
+def test_large_images_are_not_cached():
+    cache = HotImageCache(max_bytes=1000, max_item_bytes=100)
+    cache.put("pfp", "big.png", None, None, image(101))
+
+    assert cache.get("pfp", "big.png", None, None, 1) is None
+
+
+def test_least_recently_used_goes_first_over_budget():
+    cache = HotImageCache(max_bytes=30, max_item_bytes=100)
+    for name in ("a", "b", "c"):
+        cache.put("pfp", name, None, None, image(10))
+    cache.get("pfp", "a", None, None, 1)
+
+    cache.put("pfp", "d", None, None, image(10))
+
+    assert cache.get("pfp", "b", None, None, 1) is None
+    assert all(cache.get("pfp", name, None, None, 1) for name in ("a", "c", "d"))
+    assert cache.total_bytes == 30
+
+
+def test_replacing_an_entry_keeps_the_byte_count():
+    cache = HotImageCache(max_bytes=1000, max_item_bytes=100)
+    cache.put("pfp", "a", None, None, image(10))
+    cache.put("pfp", "a", None, None, image(20))
+
+    assert cache.total_bytes == 20
+
+
+def test_invalidate_drops_every_variant_of_a_name():
+    cache = HotImageCache(max_bytes=1000, max_item_bytes=100)
+    cache.put("groups", "g.png", None, None, image(10))
+    cache.put("groups", "g.png", 64, 64, image(5))
+    cache.put("groups", "other.png", None, None, image(7))
+
+    cache.invalidate("groups", "g.png")
+
+    assert cache.get("groups", "g.png", None, None, 1) is None
+    assert cache.get("groups", "g.png", 64, 64, 1) is None
+    assert cache.total_bytes == 7
+    assert ("groups", "g.png") not in cache.variants
@@ -0,0 +1,55 @@
+import json
+from item_stream import ItemStreamParser
+
+REPLY = json.dumps({
+    "receipts": {
+        "12": {"items": [
+            {"id": "1", "name": "MILK", "price": 3.49},
+            {"id": "2", "name": "SAY \"CHEESE\" {BRIE}", "price": 7.99},
+        ]},
+        "15": {"items": [{"id": "1", "name": "BREAD", "price": 2.5}]},
+    }
+})
+
+
+def feed_in(chunks):
+    parser = ItemStreamParser()
+    found = []
+    for chunk in chunks:
+        found.extend(parser.feed(chunk))
+    return found
+
+
+def test_whole_reply_in_one_chunk():
+    assert feed_in([REPLY]) == [
+        (12, {"id": "1", "name": "MILK", "price": 3.49}),
+        (12, {"id": "2", "name": "SAY \"CHEESE\" {BRIE}", "price": 7.99}),
+        (15, {"id": "1", "name": "BREAD", "price": 2.5}),
+    ]
+
+
+def test_items_split_across_chunks():
+    expected = feed_in([REPLY])
+
+    assert feed_in(REPLY) == expected  # one character at a time
+    assert feed_in([REPLY[i:i + 7] for i in range(0, len(REPLY), 7)]) == expected
+
+
+def test_an_item_is_returned_by_the_chunk_that_closes_it():
+    parser = ItemStreamParser()
+    end = REPLY.index("}") + 1
+
+    assert parser.feed(REPLY[:end - 1]) == []
+    assert parser.feed(REPLY[end - 1:end]) == [(12, {"id": "1", "name": "MILK", "price": 3.49})]
+
+
+def test_receipts_keyed_by_anything_but_an_id_are_ignored():
+    reply = json.dumps({"receipts": {"abc": {"items": [{"id": "1"}]}, "7": {"items": [{"id": "2"}]}}})
+
+    assert feed_in([reply]) == [(7, {"id": "2"})]
+
+
+def test_nested_values_inside_an_item_stay_in_the_item():
+    reply = json.dumps({"receipts": {"3": {"items": [{"id": "1", "people": [{"user_id": 4}]}]}}})
+
+    assert feed_in([reply]) == [(3, {"id": "1", "people": [{"user_id": 4}]})]
@@ -0,0 +1,237 @@
+import asyncio
+import time
+import pytest
+import jobs
+from jobs import JobQueue, JobWorker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # freezes the queue's clock at the start of the test; clock(seconds) moves it that far past
+    start = time.time()
+
+    def move(seconds):
+        monkeypatch.setattr(jobs.time, "time", lambda: start + seconds)
+
+    move(0)
+    return move
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite3"), visibility_timeout=60)
+
+
+def test_leased_job_is_hidden_until_completed(queue):
+    job_id = queue.enqueue("process_receipt", {"receipt_id": 1})
+
+    job, _ = queue.lease()
+    assert (job.job_id, job.kind, job.payload, job.attempts) == (job_id, "process_receipt", {"receipt_id": 1}, 1)
+    assert queue.lease() == (None, [])
+
+    assert queue.complete(job)
+    assert queue.lease() == (None, [])
+    assert queue.counts() == {"done": 1}
+
+
+def test_expired_lease_is_handed_out_again(queue, monkeypatch):
+    queue.enqueue("process_receipt", {"receipt_id": 1})
+    first, _ = queue.lease()
+
+    later = time.time() + 61
+    monkeypatch.setattr(jobs.time, "time", lambda: later)
+    again, _ = queue.lease()
+
+    assert again.job_id == first.job_id
+    assert again.attempts == 2
+    assert again.lease_token != first.lease_token
+
+
+def test_late_worker_cannot_overwrite_the_next_lease(queue, monkeypatch):
+    queue.enqueue("process_receipt", {})
+    first, _ = queue.lease()
+    later = time.time() + 61
+    monkeypatch.setattr(jobs.time, "time", lambda: later)
+    second, _ = queue.lease()
+
+    assert not queue.complete(first)
+    assert not queue.fail(first, "boom")
+    assert not queue.extend(first)
+    assert queue.counts() == {"leased": 1}
+    assert queue.complete(second)
+    assert queue.counts() == {"done": 1}
+
+
+def test_expired_lease_on_the_last_attempt_fails_the_job(queue, clock):
+    queue.enqueue("process_receipt", {"receipt_id": 1})
+    first, _ = queue.lease(max_attempts=2)
+    clock(61)
+    second, exhausted = queue.lease(max_attempts=2)
+    assert (second.attempts, exhausted) == (2, [])
+
+    clock(200)
+    job, exhausted = queue.lease(max_attempts=2)
+
+    assert job is None
+    assert [(expired.job_id, expired.attempts) for expired in exhausted] == [(first.job_id, 2)]
+    assert queue.counts() == {"failed": 1}
+
+
+def test_extend_pushes_the_lease_out(queue, clock):
+    queue.enqueue("process_receipt", {})
+    job, _ = queue.lease()
+    clock(50)
+    assert queue.extend(job)
+
+    clock(100)
+    assert queue.lease() == (None, [])
+
+
+def test_retry_waits_for_the_delay(queue, monkeypatch):
+    queue.enqueue("process_receipt", {})
+    job, _ = queue.lease()
+    assert queue.retry(job, delay=30, error="boom")
+
+    assert queue.lease() == (None, [])
+    later = time.time() + 31
+    monkeypatch.setattr(jobs.time, "time", lambda: later)
+    assert queue.lease()[0].attempts == 2
+
+
+def test_failed_job_is_never_leased_again(queue, monkeypatch):
+    queue.enqueue("process_receipt", {})
+    job, _ = queue.lease()
+    assert queue.fail(job, "boom")
+
+    later = time.time() + 3600
+    monkeypatch.setattr(jobs.time, "time", lambda: later)
+    assert queue.lease() == (None, [])
+    assert queue.counts() == {"failed": 1}
+
+
+def test_jobs_come_out_oldest_first(queue):
+    ids = [queue.enqueue("process_receipt", {"n": n}) for n in range(3)]
+
+    assert [queue.lease()[0].job_id for _ in ids] == ids
+
+
+async def run_until(worker, condition, timeout=5.0):
+    worker.start()
+    try:
+        async with asyncio.timeout(timeout):
+            while not condition():
+                await asyncio.sleep(0.01)
+    finally:
+        await worker.stop()
+
+
+@pytest.mark.anyio
+async def test_worker_completes_a_job_and_reports_status(queue):
+    handled = []
+    statuses = []
+
+    async def handle(payload):
+        handled.append(payload)
+
+    async def on_status(job, status):
+        statuses.append(status)
+
+    queue.enqueue("process_receipt", {"receipt_id": 5})
+    worker = JobWorker(queue, {"process_receipt": handle}, concurrency=2, max_attempts=3,
+                       backoff_base=0, poll_interval=0.01, on_status=on_status)
+    await run_until(worker, lambda: queue.counts() == {"done": 1})
+
+    assert handled == [{"receipt_id": 5}]
+    assert statuses == ["processing"]
+
+
+@pytest.mark.anyio
+async def test_worker_retries_then_fails_after_max_attempts(queue):
+    attempts = []
+    statuses = []
+
+    async def handle(payload):
+        attempts.append(payload)
+        raise RuntimeError("OCR service down")
+
+    async def on_status(job, status):
+        statuses.append(status)
+
+    queue.enqueue("process_receipt", {"receipt_id": 5})
+    worker = JobWorker(queue, {"process_receipt": handle}, concurrency=1, max_attempts=3,
+                       backoff_base=0, poll_interval=0.01, on_status=on_status)
+    await run_until(worker, lambda: statuses[-1:] == ["failed"])
+
+    assert queue.counts() == {"failed": 1}
+    assert len(attempts) == 3
+    assert statuses == ["processing", "pending", "processing", "pending", "processing", "failed"]
+
+
+@pytest.mark.anyio
+async def test_failing_status_callback_does_not_stop_the_job(queue):
+    async def handle(payload):
+        pass
+
+    async def on_status(job, status):
+        raise RuntimeError("database down")
+
+    queue.enqueue("process_receipt", {})
+    worker = JobWorker(queue, {"process_receipt": handle}, concurrency=1, max_attempts=1,
+                       backoff_base=0, poll_interval=0.01, on_status=on_status)
+    await run_until(worker, lambda: queue.counts() == {"done": 1})
+
+
+@pytest.mark.anyio
+async def test_worker_keeps_the_lease_of_a_long_job(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), visibility_timeout=0.3)
+    leased_meanwhile = []
+
+    async def handle(payload):
+        await asyncio.sleep(0.5)
+        leased_meanwhile.append(await asyncio.to_thread(queue.lease))
+
+    queue.enqueue("process_receipt", {})
+    worker = JobWorker(queue, {"process_receipt": handle}, concurrency=1, max_attempts=3,
+                       backoff_base=0, poll_interval=0.01)
+    await run_until(worker, lambda: queue.counts() == {"done": 1})
+
+    assert leased_meanwhile == [(None, [])]
+
+
+@pytest.mark.anyio
+async def test_worker_stops_a_job_whose_lease_was_taken_over(tmp_path, monkeypatch):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), visibility_timeout=0.3)
+    monkeypatch.setattr(queue, "extend", lambda job: False)
+    finished = []
+
+    async def handle(payload):
+        await asyncio.sleep(1)
+        finished.append(payload)
+
+    queue.enqueue("process_receipt", {})
+    worker = JobWorker(queue, {"process_receipt": handle}, concurrency=1, max_attempts=3,
+                       backoff_base=0, poll_interval=10)
+    worker.start()
+    await asyncio.sleep(0.2)
+    await worker.stop()
+
+    assert finished == []
+    assert queue.counts() == {"leased": 1}
+
+
+@pytest.mark.anyio
+async def test_worker_reports_jobs_that_died_on_their_last_attempt(queue, clock):
+    statuses = []
+
+    async def on_status(job, status):
+        statuses.append((job.job_id, status))
+
+    job_id = queue.enqueue("process_receipt", {})
+    queue.lease(max_attempts=1)
+    clock(3600)
+    worker = JobWorker(queue, {}, concurrency=1, max_attempts=1,
+                       backoff_base=0, poll_interval=0.01, on_status=on_status)
+    await run_until(worker, lambda: statuses)
+
+    assert statuses == [(job_id, "failed")]
+    assert queue.counts() == {"failed": 1}
@@ -0,0 +1,50 @@
+import asyncio
+import pytest
+from live_count import UserCountCache
+
+pytestmark = pytest.mark.anyio
+
+
+class CountingPool:
+    def __init__(self, count):
+        self.count = count
+        self.queries = 0
+
+    async def fetchval(self, query):
+        self.queries += 1
+        await asyncio.sleep(0.01)
+        return self.count
+
+
+async def test_concurrent_first_reads_share_one_count():
+    pool = CountingPool(12)
+    cache = UserCountCache(pool, resync_seconds=300)
+
+    counts = await asyncio.gather(*[cache.get() for _ in range(20)])
+
+    assert counts == [12] * 20
+    assert pool.queries == 1
+
+
+async def test_apply_reports_changes_only():
+    changes = []
+
+    async def on_change(count):
+        changes.append(count)
+
+    cache = UserCountCache(CountingPool(0), resync_seconds=300, on_change=on_change)
+    for payload in ("3", "3", "4"):
+        await cache.apply(payload)
+
+    assert changes == [3, 4]
+    assert await cache.get() == 4
+
+
+async def test_bad_payload_falls_back_to_a_recount():
+    pool = CountingPool(9)
+    cache = UserCountCache(pool, resync_seconds=300)
+
+    await cache.apply("not a number")
+
+    assert cache.value == 9
+    assert pool.queries == 1
@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+from llm_batch import ExtractionBatcher
+
+pytestmark = pytest.mark.anyio
+
+
+class Model:
+    def __init__(self, fail=False, skip=()):
+        self.calls = []
+        self.fail = fail
+        self.skip = skip
+
+    async def __call__(self, texts):
+        self.calls.append(dict(texts))
+        if self.fail:
+            raise RuntimeError("model unavailable")
+        return {receipt_id: [{"name": text}] for receipt_id, text in texts.items() if receipt_id not in self.skip}
+
+
+async def test_requests_within_the_wait_share_one_call():
+    model = Model()
+    batcher = ExtractionBatcher(model, max_items=10, max_wait=0.05)
+
+    results = await asyncio.gather(batcher.submit(1, "a"), batcher.submit(2, "b"), batcher.submit(3, "c"))
+
+    assert results == [[{"name": "a"}], [{"name": "b"}], [{"name": "c"}]]
+    assert model.calls == [{1: "a", 2: "b", 3: "c"}]
+
+
+async def test_a_full_batch_goes_without_waiting():
+    model = Model()
+    batcher = ExtractionBatcher(model, max_items=2, max_wait=60)
+
+    results = await asyncio.wait_for(asyncio.gather(batcher.submit(1, "a"), batcher.submit(2, "b")), 1)
+
+    assert results == [[{"name": "a"}], [{"name": "b"}]]
+    assert model.calls == [{1: "a", 2: "b"}]
+    assert batcher.timer is None
+
+
+async def test_later_requests_start_a_new_batch():
+    model = Model()
+    batcher = ExtractionBatcher(model, max_items=10, max_wait=0.01)
+
+    await batcher.submit(1, "a")
+    await batcher.submit(2, "b")
+
+    assert model.calls == [{1: "a"}, {2: "b"}]
+
+
+async def test_a_failed_call_fails_every_request_in_the_batch():
+    batcher = ExtractionBatcher(Model(fail=True), max_items=10, max_wait=0.01)
+
+    results = await asyncio.gather(batcher.submit(1, "a"), batcher.submit(2, "b"), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+async def test_a_receipt_missing_from_the_reply_fails_alone():
+    batcher = ExtractionBatcher(Model(skip={2}), max_items=10, max_wait=0.01)
+
+    results = await asyncio.gather(batcher.submit(1, "a"), batcher.submit(2, "b"), return_exceptions=True)
+
+    assert results[0] == [{"name": "a"}]
+    assert isinstance(results[1], KeyError)
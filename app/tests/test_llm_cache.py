@@ -0,0 +1,88 @@
+import json
+import time
+import pytest
+import llm_cache
+from llm_cache import ExtractionCache
+
+ITEMS = [{"id": "1", "name": "MILK", "price": 3.49, "people": []}]
+
+
+class Clock:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_cache.time, "time", clock)
+    return clock
+
+
+def make_cache(tmp_path, ttl_seconds=3600, max_bytes=1 << 20):
+    return ExtractionCache(str(tmp_path / "extractions.sqlite3"), ttl_seconds=ttl_seconds, max_bytes=max_bytes)
+
+
+def test_key_depends_on_text_model_and_prompt_version():
+    key = ExtractionCache.key("MILK 3.49", "gpt-4o-mini", 2)
+
+    assert key == ExtractionCache.key("MILK 3.49", "gpt-4o-mini", 2)
+    assert key != ExtractionCache.key("MILK 3.49 ", "gpt-4o-mini", 2)
+    assert key != ExtractionCache.key("MILK 3.49", "gpt-4o", 2)
+    assert key != ExtractionCache.key("MILK 3.49", "gpt-4o-mini", 3)
+
+
+def test_put_then_get(tmp_path, clock):
+    cache = make_cache(tmp_path)
+    cache.put("k", ITEMS)
+
+    assert cache.get("k") == ITEMS
+    assert cache.get("other") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = make_cache(tmp_path, ttl_seconds=60)
+    cache.put("k", ITEMS)
+
+    clock.now += 61
+    assert cache.get("k") is None
+    assert cache.stats()["expired"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_reads_do_not_extend_the_ttl(tmp_path, clock):
+    cache = make_cache(tmp_path, ttl_seconds=60)
+    cache.put("k", ITEMS)
+
+    clock.now += 50
+    assert cache.get("k") == ITEMS
+    clock.now += 20
+    assert cache.get("k") is None
+
+
+def test_least_recently_read_goes_first_past_the_size_cap(tmp_path, clock):
+    size = len(json.dumps(ITEMS))
+    cache = make_cache(tmp_path, max_bytes=size * 2)
+    cache.put("a", ITEMS)
+    clock.now += 1
+    cache.put("b", ITEMS)
+    clock.now += 1
+    cache.get("a")
+    clock.now += 1
+
+    cache.put("c", ITEMS)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == ITEMS and cache.get("c") == ITEMS
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= size * 2
+
+
+def test_cache_is_shared_through_the_file(tmp_path, clock):
+    make_cache(tmp_path).put("k", ITEMS)
+
+    assert make_cache(tmp_path).get("k") == ITEMS
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from ocr_engine import OcrEngine, split_strips, stitch, same_line, strip_count
+
+
+def lined_page(height=1000, width=200, line_every=50, line_height=20):
+    # white page, black text bands of line_height every line_every rows
+    page = np.full((height, width), 255, np.uint8)
+    for top in range(10, height - line_height, line_every):
+        page[top:top + line_height, 10:width - 10] = 0
+    return page
+
+
+def test_one_strip_is_the_whole_image():
+    assert split_strips(lined_page(), 1, 40) == [(0, 1000)]
+
+
+def test_strips_cover_the_image_and_cut_between_lines():
+    page = lined_page()
+    bounds = split_strips(page, 4, 40)
+
+    assert len(bounds) == 4
+    assert bounds[0][0] == 0 and bounds[-1][1] == 1000
+    for (_, bottom), (top, _) in zip(bounds, bounds[1:]):
+        # neighbouring strips overlap
+        assert top < bottom
+    for top, bottom in bounds:
+        assert (page[top] == 255).all()
+        assert (page[bottom - 1] == 255).all()
+
+
+def test_stitch_drops_lines_repeated_at_the_seam():
+    strips = [
+        ["MILK 3.49", "EGGS 2.99", "BREAD 2.50"],
+        ["EGGS 2.99", "BREAD  2.50", "APPLES 4.10"],
+        ["APPLES 4.10", "TOTAL 13.08"],
+    ]
+
+    assert stitch(strips) == ["MILK 3.49", "EGGS 2.99", "BREAD 2.50", "APPLES 4.10", "TOTAL 13.08"]
+
+
+def test_stitch_keeps_items_that_differ_only_in_price():
+    strips = [["APPLES 4.10", "BANANA 0.19"], ["BANANA 0.79", "TOTAL 5.08"]]
+
+    assert stitch(strips) == ["APPLES 4.10", "BANANA 0.19", "BANANA 0.79", "TOTAL 5.08"]
+
+
+def test_same_line_only_ignores_whitespace():
+    assert same_line("BANANA  0.19", "BANANA 0.19")
+    assert not same_line("BANANA 0.19", "BANANA 0.79")
+    assert not same_line("BANANA 0.19", "banana 0.19")
+
+
+def test_unknown_denoise_profile_is_rejected():
+    with pytest.raises(ValueError):
+        OcrEngine(workers=1, profile="sharpest")
+
+
+def test_one_strip_per_worker_down_to_the_minimum_height():
+    assert strip_count(2000, 16, 100) == 16
+    assert strip_count(2000, 32, 100) == 20
+    assert strip_count(150, 16, 100) == 1
+    assert strip_count(50, 16, 100) == 1
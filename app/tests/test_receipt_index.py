@@ -0,0 +1,118 @@
+from io import BytesIO
+import pytest
+from PIL import Image
+from imaging import Fingerprint, PROFILES, ingest
+from receipt_index import ReceiptIndex
+from receipt_parser import ParsedReceipt
+from services.receipt import ReceiptProcessor
+
+
+@pytest.fixture
+def index(tmp_path):
+    return ReceiptIndex(str(tmp_path / "receipts.sqlite3"), max_distance=6)
+
+
+def test_exact_and_near_matches_are_kept_apart(index):
+    index.add(1, 7, Fingerprint("aaa", 0b1111))
+    index.add(2, 7, Fingerprint("bbb", 0b0111))  # one bit away
+    index.add(3, 7, Fingerprint("aaa", 0))
+    index.add(4, 7, Fingerprint("ccc", (1 << 64) - 1))  # every bit differs
+    index.add(5, 8, Fingerprint("aaa", 0b1111))  # another user
+
+    exact, near = index.matches(7, Fingerprint("aaa", 0b1111))
+
+    assert exact == [3, 1]
+    assert near == [2]
+
+
+def test_high_bit_hashes_round_trip(index):
+    high = (1 << 63) | 1
+    index.add(1, 7, Fingerprint("aaa", high))
+
+    assert index.matches(7, Fingerprint("zzz", high ^ 0b11)) == ([], [1])
+
+
+def test_removed_receipts_no_longer_match(index):
+    index.add(1, 7, Fingerprint("aaa", 0))
+    index.add(2, 7, Fingerprint("aaa", 0))
+
+    index.remove([1])
+
+    assert index.matches(7, Fingerprint("aaa", 0)) == ([2], [])
+
+
+def test_only_receipt_uploads_are_fingerprinted(tmp_path):
+    upload = BytesIO()
+    Image.new("RGB", (120, 80), "white").save(upload, format="JPEG")
+
+    fingerprint = ingest(upload.getvalue(), PROFILES["receipt"], str(tmp_path / "receipt.png"))
+
+    assert len(fingerprint.sha256) == 64
+    assert ingest(upload.getvalue(), PROFILES["pfp"], str(tmp_path / "pfp.png")) is None
+    assert ingest(upload.getvalue(), PROFILES["group"], str(tmp_path / "group.png")) is None
+
+
+class ReceiptRows:
+    def __init__(self, rows):
+        self.rows = {row["receipt_id"]: row for row in rows}
+        self.queries = []
+
+    async def get_many(self, receipt_ids):
+        self.queries.append(list(receipt_ids))
+        return [self.rows[receipt_id] for receipt_id in receipt_ids if receipt_id in self.rows]
+
+
+def completed(receipt_id, *prices):
+    items = [{"id": str(i), "name": f"item {i}", "price": price, "people": []} for i, price in enumerate(prices, 1)]
+    return {"receipt_id": receipt_id, "status": "completed", "processed_data": {"items": items}}
+
+
+def processor(index, rows):
+    return ReceiptProcessor(
+        repository=ReceiptRows(rows), events=None, images=None, jobs=None,
+        index=index, cache=None, http=None
+    )
+
+
+@pytest.mark.anyio
+async def test_only_an_exact_match_is_reused_at_upload(index):
+    index.add(1, 7, Fingerprint("aaa", 0))
+    index.add(2, 7, Fingerprint("bbb", 1))
+    index.add(3, 7, Fingerprint("ccc", 3))
+    service = processor(index, [
+        completed(1, 3.50),
+        completed(2, 1.25),
+        {"receipt_id": 3, "status": "pending", "processed_data": None},
+    ])
+
+    duplicate, similar = await service.find_duplicate(7, Fingerprint("aaa", 0))
+
+    assert duplicate["receipt_id"] == 1
+    assert similar == [2]
+    assert service.repository.queries == [[1, 2, 3]]
+
+
+@pytest.mark.anyio
+async def test_deleted_receipts_are_skipped_and_leave_the_index(index):
+    index.add(1, 7, Fingerprint("aaa", 0))
+    index.add(2, 7, Fingerprint("aaa", 0))
+    service = processor(index, [completed(1, 3.50)])
+
+    duplicate, similar = await service.find_duplicate(7, Fingerprint("aaa", 0))
+
+    assert duplicate["receipt_id"] == 1
+    assert similar == []
+    assert index.matches(7, Fingerprint("aaa", 0)) == ([1], [])
+
+
+@pytest.mark.anyio
+async def test_look_alike_is_reused_only_when_its_items_match_the_ocr_subtotal(index):
+    service = processor(index, [completed(1, 2.00, 1.50), completed(2, 2.00, 1.25)])
+
+    def read(subtotal=None, total=None, tax=None):
+        return ParsedReceipt(items=[], subtotal=subtotal, tax=tax, tip=None, total=total, confidence=0.3)
+
+    assert (await service.similar_items([1, 2], read(subtotal=3.25)))[1]["price"] == 1.25
+    assert (await service.similar_items([1, 2], read(total=3.78, tax=0.28)))[1]["price"] == 1.50
+    assert await service.similar_items([1, 2], read(subtotal=9.99)) is None
+    assert await service.similar_items([1, 2], read()) is None
@@ -0,0 +1,61 @@
+import json
+import os
+import pytest
+from receipt_parser import close, parse_receipt
+
+CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "receipt_corpus.json")
+
+
+def test_items_and_summary_that_add_up():
+    parsed = parse_receipt("CAFE\nLatte 4.50\nMuffin $3.25 T\nSubtotal 7.75\nTax 0.62\nTip 1.50\nTotal 9.87\nVISA 9.87")
+
+    assert [(item["name"], item["price"]) for item in parsed.items] == [("Latte", 4.5), ("Muffin", 3.25)]
+    assert (parsed.subtotal, parsed.tax, parsed.tip, parsed.total) == (7.75, 0.62, 1.5, 9.87)
+    assert parsed.confidence == 1.0
+
+
+def test_items_get_ids_and_empty_people():
+    parsed = parse_receipt("Tea 2.00\nScone 3.00")
+
+    assert parsed.items == [
+        {"id": "1", "name": "Tea", "price": 2.0, "people": []},
+        {"id": "2", "name": "Scone", "price": 3.0, "people": []},
+    ]
+
+
+def test_wrapped_names_join_but_modifiers_do_not():
+    parsed = parse_receipt("1 Pad Thai $12.00\n(Shrimp)\n-Extra Spicy\nSubtotal $12.00")
+
+    assert parsed.items[0]["name"] == "Pad Thai (Shrimp)"
+
+
+def test_payment_lines_and_lines_after_the_total_are_not_items():
+    parsed = parse_receipt("Soup 5.00\nTotal 5.00\nCash 10.00\nChange 5.00\nRewards Bonus 1.00")
+
+    assert [item["name"] for item in parsed.items] == ["Soup"]
+
+
+def test_confidence_drops_when_items_do_not_add_up():
+    parsed = parse_receipt("Soup 5.00\nSalad 6.00\nSubtotal 14.00\nTotal 14.00")
+
+    assert parsed.confidence < 0.7
+
+
+def test_text_without_prices_has_no_confidence():
+    parsed = parse_receipt("Steven P. Jobs\nChairman of the Board")
+
+    assert parsed.items == [] and parsed.confidence == 0.0
+
+
+def test_close_allows_rounding_only():
+    assert close(10.0, 10.01) and not close(10.0, 10.02)
+
+
+@pytest.mark.parametrize("entry", json.load(open(CORPUS)), ids=lambda entry: entry.get("name") or entry["image"])
+def test_corpus_confident_parses_add_up(entry):
+    # names are scored fuzzily by benchmarks/parser.py; a confident parse must at least bill the right amount
+    parsed = parse_receipt(entry["text"])
+
+    if parsed.confidence >= 0.9:
+        assert close(sum(item["price"] for item in parsed.items), sum(item["price"] for item in entry["items"]))
+    assert parsed.total == entry["total"]
@@ -0,0 +1,135 @@
+import asyncio
+import fcntl
+import os
+import pytest
+from relay import HostRelay
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / "relay.sock"), str(tmp_path / "relay.lock")
+
+
+def make_relay(paths, **kwargs):
+    return HostRelay(*paths, retry_seconds=0.01, **kwargs)
+
+
+async def wait_until(condition, timeout=2.0):
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+def lock_is_free(lock_path):
+    fd = os.open(lock_path, os.O_RDWR)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
+    finally:
+        os.close(fd)
+
+
+async def test_follower_gets_retained_messages_before_start_returns(paths):
+    leader = make_relay(paths)
+    await leader.start()
+    leader.publish("user_count", 41, retain=True)
+    leader.publish("user_count", 42, retain=True)
+    leader.publish("ephemeral", "x")
+
+    follower = make_relay(paths)
+    counts = []
+    follower.subscribe("user_count", counts.append)
+    await follower.start()
+
+    assert leader.is_leader and not follower.is_leader
+    assert counts == [42]
+    await follower.stop()
+    await leader.stop()
+
+
+async def test_messages_reach_every_worker(paths):
+    leader, follower = make_relay(paths), make_relay(paths)
+    seen = {"leader": [], "follower": []}
+    leader.subscribe("receipt_events", seen["leader"].append)
+    follower.subscribe("receipt_events", seen["follower"].append)
+    await leader.start()
+    await follower.start()
+
+    follower.publish("receipt_events", {"receipt_id": 1})
+    leader.publish("receipt_events", {"receipt_id": 2})
+    await wait_until(lambda: len(seen["follower"]) == 2 and len(seen["leader"]) == 2)
+
+    # each worker's own messages arrive in order, the two sources interleave
+    for messages in seen.values():
+        assert sorted(message["receipt_id"] for message in messages) == [1, 2]
+    await follower.stop()
+    await leader.stop()
+
+
+async def test_failed_on_lead_steps_down_and_retries(paths):
+    calls = []
+    step_downs = []
+
+    async def on_lead():
+        calls.append(relay.is_leader)
+        if len(calls) == 1:
+            raise RuntimeError("LISTEN failed")
+
+    async def on_step_down():
+        step_downs.append(len(calls))
+
+    relay = make_relay(paths, on_lead=on_lead, on_step_down=on_step_down)
+    await relay.start()
+
+    # leadership is only claimed once on_lead has succeeded
+    assert calls == [False, False]
+    assert step_downs == [1]
+    assert relay.is_leader
+
+    await relay.stop()
+    assert step_downs == [1, 2]
+    assert lock_is_free(paths[1])
+
+
+async def test_failed_on_lead_lets_another_worker_lead(paths):
+    failures = []
+
+    async def on_lead():
+        failures.append(True)
+        raise RuntimeError("LISTEN failed")
+
+    # waits long enough between attempts for the other worker to get the lock
+    broken = HostRelay(*paths, on_lead=on_lead, retry_seconds=10)
+    await broken.start(timeout=0.1)
+    assert failures == [True]
+    assert broken.lock_fd is None and lock_is_free(paths[1])
+
+    healthy = make_relay(paths)
+    await healthy.start()
+    assert healthy.is_leader
+    await healthy.stop()
+    await broken.stop()
+
+
+async def test_follower_takes_over_when_the_leader_stops(paths):
+    leads = []
+
+    async def on_lead():
+        leads.append(True)
+
+    leader = make_relay(paths)
+    follower = make_relay(paths, on_lead=on_lead)
+    await leader.start()
+    await follower.start()
+    leader.publish("user_count", 7, retain=True)
+    await asyncio.sleep(0.05)
+
+    await leader.stop()
+    await wait_until(lambda: follower.is_leader)
+
+    assert leads == [True]
+    await follower.stop()
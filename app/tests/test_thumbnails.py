@@ -0,0 +1,153 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from PIL import Image
+import thumbnails
+from thumbnails import ThumbnailCache
+
+pytestmark = pytest.mark.anyio
+
+
+class Images:
+    # ThumbnailCache only needs the ingest pool; threads keep the test fast
+    def __init__(self):
+        self.pool = ThreadPoolExecutor(max_workers=2)
+
+
+@pytest.fixture
+def images():
+    images = Images()
+    yield images
+    images.pool.shutdown()
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "photo.png"
+    Image.new("RGB", (400, 300), "red").save(path)
+    return str(path)
+
+
+def cached_files(directory):
+    return sorted(name for name in os.listdir(directory) if not name.startswith("."))
+
+
+async def test_variant_is_rendered_once_at_the_requested_size(tmp_path, images, source, monkeypatch):
+    renders = []
+    render_to_file = thumbnails.render_to_file
+
+    def counted(*args):
+        renders.append(args)
+        return render_to_file(*args)
+
+    monkeypatch.setattr(thumbnails, "render_to_file", counted)
+    cache = ThumbnailCache(images, str(tmp_path / "thumbs"), max_bytes=1 << 20)
+
+    paths = await asyncio.gather(*[cache.get(source, 64, 64) for _ in range(5)])
+    again = await cache.get(source, 64, 64)
+
+    assert len(set(paths)) == 1 and again == paths[0]
+    assert len(renders) == 1
+    with Image.open(again) as image:
+        assert image.size == (64, 64)
+
+
+async def test_file_removed_by_another_worker_is_rendered_again(tmp_path, images, source):
+    directory = str(tmp_path / "thumbs")
+    this_worker = ThumbnailCache(images, directory, max_bytes=1 << 20)
+    other_worker = ThumbnailCache(images, directory, max_bytes=1 << 20)
+
+    path = await this_worker.get(source, 32, None)
+    os.unlink(await other_worker.get(source, 32, None))
+
+    assert await this_worker.get(source, 32, None) == path
+    assert os.path.exists(path)
+
+
+async def test_byte_cap_holds_across_workers_sharing_the_directory(tmp_path, images, source):
+    directory = str(tmp_path / "thumbs")
+    first = ThumbnailCache(images, directory, max_bytes=1 << 20, scan_bytes=0)
+    one = await first.get(source, 50, None)
+    size = os.path.getsize(one)
+
+    # room for about two variants of this size, scanned after every render
+    second = ThumbnailCache(images, directory, max_bytes=int(size * 2.5), scan_bytes=0)
+    first.max_bytes = second.max_bytes
+    other = await second.get(source, 51, None)
+    # mtimes from the coarse file clock can tie, so age both explicitly
+    os.utime(one, ns=(1_000_000_000, 1_000_000_000))
+    os.utime(other, ns=(2_000_000_000, 2_000_000_000))
+    await first.get(source, 50, None)  # a hit makes it the most recent again
+    newest = await second.get(source, 52, None)
+
+    names = cached_files(directory)
+    assert len(names) == 2
+    assert os.path.basename(one) in names and os.path.basename(newest) in names
+    assert sum(os.path.getsize(os.path.join(directory, name)) for name in names) <= second.max_bytes
+
+
+async def test_newest_variant_is_kept_even_over_the_cap(tmp_path, images, source):
+    cache = ThumbnailCache(images, str(tmp_path / "thumbs"), max_bytes=1, scan_bytes=0)
+
+    path = await cache.get(source, 20, 20)
+
+    assert os.path.exists(path)
+    assert len(cached_files(cache.directory)) == 1
+
+
+async def test_changed_source_gets_a_new_variant(tmp_path, images, source):
+    cache = ThumbnailCache(images, str(tmp_path / "thumbs"), max_bytes=1 << 20)
+    before = await cache.get(source, 40, None)
+
+    Image.new("RGB", (500, 300), "blue").save(source)
+    os.utime(source, ns=(1, 1))
+
+    assert await cache.get(source, 40, None) != before
+
+
+async def test_directory_is_scanned_only_after_scan_bytes_of_renders(tmp_path, images, source, monkeypatch):
+    cache = ThumbnailCache(images, str(tmp_path / "thumbs"), max_bytes=1 << 20)
+    scans = []
+    monkeypatch.setattr(cache, "evict", lambda keep=None: scans.append(keep))
+    size = os.path.getsize(await cache.get(source, 60, None))
+    cache.scan_bytes = size * 3
+    cache.rendered_bytes = 0
+
+    for width in range(61, 66):
+        await cache.get(source, width, None)
+
+    assert len(scans) == 1
+
+
+async def test_eviction_trims_below_the_cap(tmp_path, images, source):
+    directory = str(tmp_path / "thumbs")
+    cache = ThumbnailCache(images, directory, max_bytes=1 << 20, scan_bytes=1 << 30)
+    paths = [await cache.get(source, width, None) for width in range(30, 36)]
+    for age, path in enumerate(paths):
+        os.utime(path, ns=(age * 1_000_000_000, age * 1_000_000_000))
+    size = max(os.path.getsize(path) for path in paths)
+
+    cache.max_bytes, cache.scan_bytes = size * 4, size * 2
+    cache.evict()
+
+    assert cached_files(directory) == sorted(os.path.basename(path) for path in paths[-2:])
+
+
+async def test_read_renders_again_when_the_file_vanishes(tmp_path, images, source, monkeypatch):
+    cache = ThumbnailCache(images, str(tmp_path / "thumbs"), max_bytes=1 << 20)
+    path = await cache.get(source, 70, None)
+    read_file = thumbnails.read_file
+    calls = []
+
+    def evicted_once(name):
+        calls.append(name)
+        if len(calls) == 1:
+            os.unlink(name)  # another worker's eviction lands between get() and the read
+        return read_file(name)
+
+    monkeypatch.setattr(thumbnails, "read_file", evicted_once)
+    again, body = await cache.read(source, 70, None)
+
+    assert again == path and len(calls) == 2
+    assert body == read_file(path)
@@ -0,0 +1,122 @@
+import pytest
+import token_cache
+from token_cache import TokenCache
+
+ALICE = {"user_id": 1, "username": "alice"}
+BOB = {"user_id": 2, "username": "bob"}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class Relay:
+    """Delivers to every cache subscribed to it, like HostRelay across workers."""
+    def __init__(self):
+        self.handlers = {}
+
+    def subscribe(self, channel, handler):
+        self.handlers.setdefault(channel, []).append(handler)
+
+    def publish(self, channel, message):
+        for handler in self.handlers.get(channel, []):
+            handler(message)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(token_cache.time, "time", clock)
+    return clock
+
+
+def test_put_then_get(clock):
+    cache = TokenCache(max_entries=10, ttl_seconds=60)
+    cache.put("token-a", ALICE, exp=clock.now + 600)
+
+    assert cache.get("token-a") == ALICE
+    assert cache.get("token-b") is None
+
+
+def test_entry_ends_at_the_token_exp(clock):
+    cache = TokenCache(max_entries=10, ttl_seconds=60)
+    cache.put("token-a", ALICE, exp=clock.now + 30)
+
+    clock.now += 30
+    assert cache.get("token-a") is None
+    assert not cache.entries and not cache.by_user
+
+
+def test_entry_ends_after_the_ttl_when_that_is_sooner(clock):
+    cache = TokenCache(max_entries=10, ttl_seconds=60)
+    cache.put("token-a", ALICE, exp=clock.now + 600)
+
+    clock.now += 59
+    assert cache.get("token-a") == ALICE
+    clock.now += 1
+    assert cache.get("token-a") is None
+
+
+def test_least_recently_used_goes_past_max_entries(clock):
+    cache = TokenCache(max_entries=2, ttl_seconds=60)
+    cache.put("token-a", ALICE, exp=clock.now + 600)
+    cache.put("token-b", BOB, exp=clock.now + 600)
+    cache.get("token-a")
+
+    cache.put("token-c", ALICE, exp=clock.now + 600)
+
+    assert cache.get("token-b") is None
+    assert cache.get("token-a") == ALICE and cache.get("token-c") == ALICE
+    assert 2 not in cache.by_user
+
+
+def test_invalidate_user_drops_every_token_of_that_user(clock):
+    cache = TokenCache(max_entries=10, ttl_seconds=60)
+    cache.put("token-a", ALICE, exp=clock.now + 600)
+    cache.put("token-a2", ALICE, exp=clock.now + 600)
+    cache.put("token-b", BOB, exp=clock.now + 600)
+
+    cache.invalidate_user(1)
+
+    assert cache.get("token-a") is None and cache.get("token-a2") is None
+    assert cache.get("token-b") == BOB
+    assert list(cache.by_user) == [2]
+
+
+def test_invalidate_user_reaches_other_workers_through_the_relay(clock):
+    relay = Relay()
+    here, there = TokenCache(max_entries=10, ttl_seconds=60), TokenCache(max_entries=10, ttl_seconds=60)
+    here.attach(relay)
+    there.attach(relay)
+    here.put("token-a", ALICE, exp=clock.now + 600)
+    there.put("token-a", ALICE, exp=clock.now + 600)
+
+    here.invalidate_user(1)
+
+    assert here.get("token-a") is None and there.get("token-a") is None
+
+
+def test_tokens_are_not_stored_in_the_clear(clock):
+    cache = TokenCache(max_entries=10, ttl_seconds=60)
+    cache.put("token-a", ALICE, exp=clock.now + 600)
+
+    assert list(cache.entries) == [TokenCache.key("token-a")]
+    assert b"token-a" not in TokenCache.key("token-a")
+
+
+def test_invalidate_user_drops_locally_even_if_the_relay_loses_it(clock):
+    class LossyRelay(Relay):
+        def publish(self, channel, message):
+            pass  # follower outbox full
+
+    cache = TokenCache(max_entries=10, ttl_seconds=60)
+    cache.attach(LossyRelay())
+    cache.put("token-a", ALICE, exp=clock.now + 600)
+
+    cache.invalidate_user(1)
+
+    assert cache.get("token-a") is None
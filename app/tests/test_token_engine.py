@@ -0,0 +1,183 @@
+import hashlib
+import hmac
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import jwt
+import pytest
+from token_engine import TokenEngine, TokenSigner, b64encode
+
+SECRET = "test-secret-key-with-enough-length-for-hs256"
+
+
+def outcome(decode, token):
+    try:
+        return decode(token)
+    except jwt.PyJWTError as e:
+        return type(e)
+
+
+@pytest.fixture
+def signer():
+    return TokenSigner("HS256", SECRET, SECRET)
+
+
+def test_round_trip(signer):
+    exp = datetime.now(timezone.utc) + timedelta(minutes=5)
+    claims = signer.decode(signer.encode({"sub": "alice", "exp": exp}))
+
+    assert claims == {"sub": "alice", "exp": int(exp.timestamp())}
+
+
+def test_cached_claims_are_copies(signer):
+    token = signer.encode({"sub": "alice", "exp": int(time.time()) + 300})
+    claims = signer.decode(token)
+    claims["sub"] = "mallory"
+
+    assert signer.decode(token)["sub"] == "alice"
+    assert signer.decode(token) is not signer.decode(token)
+
+
+def test_cached_token_still_expires(signer, monkeypatch):
+    exp = int(time.time()) + 300
+    token = signer.encode({"sub": "alice", "exp": exp})
+    signer.decode(token)
+    assert token in signer.claims
+
+    monkeypatch.setattr(time, "time", lambda: exp)
+    with pytest.raises(jwt.ExpiredSignatureError):
+        signer.decode(token)
+    assert token not in signer.claims
+
+
+def test_claims_cache_is_bounded():
+    signer = TokenSigner("HS256", SECRET, SECRET, cache_size=2)
+    tokens = [signer.encode({"sub": f"user{i}"}) for i in range(3)]
+    for token in tokens:
+        signer.decode(token)
+
+    assert list(signer.claims) == tokens[1:]
+
+
+def test_tokens_are_interchangeable_with_pyjwt(signer):
+    exp = int(time.time()) + 300
+    ours = signer.encode({"sub": "alice", "exp": exp})
+    theirs = jwt.encode({"sub": "alice", "exp": exp}, SECRET, algorithm="HS256")
+
+    assert ours == theirs
+    assert jwt.decode(ours, SECRET, algorithms=["HS256"]) == signer.decode(theirs) == {"sub": "alice", "exp": exp}
+
+
+def test_tampered_signature_is_rejected(signer):
+    token = signer.encode({"sub": "alice", "exp": time.time() + 300})
+    header, payload, signature = token.split(".")
+    forged = "A" if signature[0] != "A" else "B"
+
+    with pytest.raises(jwt.InvalidSignatureError):
+        signer.decode(f"{header}.{payload}.{forged}{signature[1:]}")
+
+
+def test_tampered_payload_is_rejected(signer):
+    token = signer.encode({"sub": "alice", "exp": int(time.time()) + 300})
+    other = signer.encode({"sub": "mallory", "exp": int(time.time()) + 300})
+    header, _, signature = token.split(".")
+
+    with pytest.raises(jwt.InvalidSignatureError):
+        signer.decode(f"{header}.{other.split('.')[1]}.{signature}")
+
+
+def test_token_signed_with_another_key_is_rejected(signer):
+    token = TokenSigner("HS256", "another-secret-key-of-the-same-length!!", None).encode({"sub": "alice"})
+
+    with pytest.raises(jwt.InvalidSignatureError):
+        signer.decode(token)
+
+
+def test_expired_and_immature_tokens(signer):
+    now = int(time.time())
+
+    with pytest.raises(jwt.ExpiredSignatureError):
+        signer.decode(signer.encode({"sub": "alice", "exp": now - 1}))
+    with pytest.raises(jwt.ImmatureSignatureError):
+        signer.decode(signer.encode({"sub": "alice", "nbf": now + 60}))
+    assert signer.decode(signer.encode({"sub": "alice", "nbf": now - 1}))["sub"] == "alice"
+
+
+@pytest.mark.parametrize("claims", [
+    {"sub": "alice"},
+    {"sub": "alice", "exp": 1},
+    {"sub": "alice", "exp": "soon"},
+    {"sub": "alice", "exp": 10_000_000_000.5},
+    {"sub": 7},
+    {"sub": "alice", "aud": "elsewhere"},
+    {"sub": "alice", "iss": "someone"},
+    {"sub": "alice", "iat": 10_000_000_000},
+    {"sub": "alice", "iat": "yesterday"},
+    {"sub": "alice", "nbf": True},
+])
+def test_claim_checks_match_pyjwt(signer, claims):
+    token = jwt.encode(claims, SECRET, algorithm="HS256")
+
+    assert outcome(signer.decode, token) == outcome(lambda t: jwt.decode(t, SECRET, algorithms=["HS256"]), token)
+
+
+def test_non_object_payload_is_rejected(signer):
+    # PyJWT will not sign one, so sign it by hand
+    signing_input = signer.header + b"." + b64encode(json.dumps(["alice"]).encode())
+    signature = hmac.new(SECRET.encode(), signing_input, hashlib.sha256).digest()
+    token = (signing_input + b"." + b64encode(signature)).decode()
+
+    with pytest.raises(jwt.DecodeError):
+        signer.decode(token)
+    with pytest.raises(jwt.DecodeError):
+        jwt.decode(token, SECRET, algorithms=["HS256"])
+
+
+def test_other_headers_fall_back_to_pyjwt(signer):
+    exp = int(time.time()) + 300
+    with_kid = jwt.encode({"sub": "alice", "exp": exp}, SECRET, algorithm="HS256", headers={"kid": "1"})
+    other_algorithm = jwt.encode({"sub": "alice", "exp": exp}, SECRET, algorithm="HS512")
+
+    assert signer.decode(with_kid) == {"sub": "alice", "exp": exp}
+    with pytest.raises(jwt.InvalidAlgorithmError):
+        signer.decode(other_algorithm)
+    with pytest.raises(jwt.DecodeError):
+        signer.decode("not-a-token")
+
+
+def test_engine_signs_access_and_refresh_with_separate_secrets():
+    settings = SimpleNamespace(
+        JWT_ASYMMETRIC_ALGORITHM=None, ALGORITHM="HS256", JWT_CLAIMS_CACHE_SIZE=16,
+        SECRET_KEY=SECRET, REFRESH_SECRET_KEY=SECRET[::-1]
+    )
+    engine = TokenEngine(settings)
+    token = engine.access.encode({"sub": "alice"})
+
+    assert engine.access.decode(token) == {"sub": "alice"}
+    with pytest.raises(jwt.InvalidSignatureError):
+        engine.refresh.decode(token)
+
+
+def test_engine_asymmetric_access_tokens(tmp_path):
+    pytest.importorskip("cryptography")
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+    private = Ed25519PrivateKey.generate()
+    (tmp_path / "private.pem").write_bytes(private.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ))
+    (tmp_path / "public.pem").write_bytes(private.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ))
+    settings = SimpleNamespace(
+        JWT_ASYMMETRIC_ALGORITHM="EdDSA", ALGORITHM="HS256", JWT_CLAIMS_CACHE_SIZE=16,
+        JWT_PRIVATE_KEY_PATH=str(tmp_path / "private.pem"), JWT_PUBLIC_KEY_PATH=str(tmp_path / "public.pem"),
+        SECRET_KEY=SECRET, REFRESH_SECRET_KEY=SECRET[::-1]
+    )
+    engine = TokenEngine(settings)
+    token = engine.access.encode({"sub": "alice"})
+
+    assert engine.access.decode(token) == {"sub": "alice"}
+    assert jwt.decode(token, private.public_key(), algorithms=["EdDSA"]) == {"sub": "alice"}
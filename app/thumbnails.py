@@ -0,0 +1,121 @@
+import asyncio
+import hashlib
+import os
+from io import BytesIO
+from PIL import Image, ImageOps
+from imaging import read_file, write_atomic
+
+
+def render(source_path: str, width: int | None, height: int | None) -> bytes:
+    image = Image.open(source_path)
+    fmt = image.format
+
+    if width and height:
+        # avatars: fill the box and crop the overflow
+        image.draft("RGB", (width, height))
+        image = ImageOps.fit(image, (width, height), Image.LANCZOS)
+    else:
+        box = (width or image.width, height or image.height)
+        image.draft("RGB", box)
+        image.thumbnail(box, Image.LANCZOS)
+
+    output_buffer = BytesIO()
+    image.save(output_buffer, format=fmt)
+    return output_buffer.getvalue()
+
+
+def render_to_file(source_path: str, width: int | None, height: int | None, path: str) -> int:
+    data = render(source_path, width, height)
+    write_atomic(data, path)
+    return len(data)
+
+
+class ThumbnailCache:
+    """
+    Resized variants of stored images, rendered once in the ingest pool and
+    kept on disk under a content-addressed name. Every worker shares the
+    directory, so recency and the byte cap come from the files themselves:
+    a hit bumps the file's mtime and eviction removes the oldest files.
+    The directory is scanned once this worker has rendered scan_bytes since
+    the last scan (max_bytes / 16 by default), and trimmed to scan_bytes
+    below the cap, so it can overshoot by scan_bytes per worker in between.
+    """
+    def __init__(self, images, directory: str, max_bytes: int, scan_bytes: int | None = None):
+        self.images = images
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.scan_bytes = max_bytes // 16 if scan_bytes is None else scan_bytes
+        self.rendered_bytes = 0
+        self.pending: dict[str, asyncio.Future] = {}
+        os.makedirs(directory, exist_ok=True)
+
+
+    def key(self, source_path: str, width: int | None, height: int | None) -> str:
+        stat = os.stat(source_path)
+        identity = f"{source_path}:{stat.st_size}:{stat.st_mtime_ns}:{width}x{height}"
+        extension = os.path.splitext(source_path)[1]
+        return hashlib.sha256(identity.encode()).hexdigest() + extension
+
+
+    async def get(self, source_path: str, width: int | None, height: int | None) -> str:
+        name = self.key(source_path, width, height)
+        path = os.path.join(self.directory, name)
+
+        try:
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            # never rendered, or evicted by this or another worker
+            pass
+
+        # concurrent requests for the same variant share one render
+        future = self.pending.get(name)
+        if future is None:
+            future = asyncio.ensure_future(self._render(source_path, width, height, path))
+            self.pending[name] = future
+            future.add_done_callback(lambda _: self.pending.pop(name, None))
+        await asyncio.shield(future)
+        return path
+
+
+    async def read(self, source_path: str, width: int | None, height: int | None) -> tuple[str, bytes]:
+        path = await self.get(source_path, width, height)
+        try:
+            return path, await asyncio.to_thread(read_file, path)
+        except FileNotFoundError:
+            # another worker evicted it between get() and the read
+            path = await self.get(source_path, width, height)
+            return path, await asyncio.to_thread(read_file, path)
+
+
+    async def _render(self, source_path, width, height, path):
+        loop = asyncio.get_running_loop()
+        self.rendered_bytes += await loop.run_in_executor(
+            self.images.pool, render_to_file, source_path, width, height, path
+        )
+        if self.rendered_bytes >= self.scan_bytes:
+            self.rendered_bytes = 0
+            await asyncio.to_thread(self.evict, path)
+
+
+    def evict(self, keep: str | None = None):
+        files = []
+        total_bytes = 0
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.startswith("."):
+                stat = entry.stat()
+                files.append((stat.st_mtime_ns, entry.path, stat.st_size))
+                total_bytes += stat.st_size
+
+        if total_bytes <= self.max_bytes:
+            return
+        for _, path, size in sorted(files):
+            if total_bytes <= self.max_bytes - self.scan_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
@@ -0,0 +1,72 @@
+import hashlib
+import time
+from collections import OrderedDict, defaultdict
+
+
+class TokenCache:
+    """
+    Verified access tokens -> user record, so an authenticated request
+    skips both the JWT decode and the user lookup. Entries live until the
+    token's exp or ttl_seconds, whichever is sooner, and are dropped when
+    the user changes.
+    """
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries: OrderedDict[bytes, tuple[dict, float]] = OrderedDict()
+        self.by_user: dict[int, set[bytes]] = defaultdict(set)
+        self.relay = None
+
+
+    def attach(self, relay):
+        # invalidations reach the caches in the other workers through the host relay
+        self.relay = relay
+        relay.subscribe("auth_invalidate", self._drop_user)
+
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+
+    def get(self, token: str) -> dict | None:
+        key = self.key(token)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        user, expires_at = entry
+        if time.time() >= expires_at:
+            self._drop(key)
+            return None
+        self.entries.move_to_end(key)
+        return user
+
+
+    def put(self, token: str, user: dict, exp: float):
+        key = self.key(token)
+        self.entries[key] = (user, min(exp, time.time() + self.ttl_seconds))
+        self.entries.move_to_end(key)
+        self.by_user[user["user_id"]].add(key)
+        while len(self.entries) > self.max_entries:
+            self._drop(next(iter(self.entries)))
+
+
+    def invalidate_user(self, user_id: int):
+        # dropped here first, so this worker never depends on the relay delivering it
+        self._drop_user(user_id)
+        if self.relay is not None:
+            self.relay.publish("auth_invalidate", user_id)
+
+
+    def _drop_user(self, user_id: int):
+        for key in self.by_user.pop(user_id, ()):
+            self.entries.pop(key, None)
+
+
+    def _drop(self, key: bytes):
+        user, _ = self.entries.pop(key)
+        keys = self.by_user.get(user["user_id"])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.by_user[user["user_id"]]
@@ -0,0 +1,160 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+from calendar import timegm
+from collections import OrderedDict
+from datetime import datetime
+import jwt
+
+
+HMAC_DIGESTS = {
+    "HS256": hashlib.sha256,
+    "HS384": hashlib.sha384,
+    "HS512": hashlib.sha512,
+}
+
+
+def b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def b64decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+def checked_here(claims: dict) -> bool:
+    # claims PyJWT would validate beyond signature, exp and nbf send the token to jwt.decode
+    if any(name in claims for name in ("aud", "iss", "iat")):
+        return False
+    if "sub" in claims and not isinstance(claims["sub"], str):
+        return False
+    return all(type(claims[name]) in (int, float) for name in ("exp", "nbf") if name in claims)
+
+
+def load_pem(path: str, private: bool):
+    # cryptography is only needed for the asymmetric mode (pip install "PyJWT[crypto]")
+    from cryptography.hazmat.primitives import serialization
+
+    with open(path, "rb") as f:
+        data = f.read()
+    if private:
+        return serialization.load_pem_private_key(data, password=None)
+    return serialization.load_pem_public_key(data)
+
+
+class TokenSigner:
+    """
+    Signs and verifies JWTs for one key. The key objects are built once;
+    HMAC tokens in the exact shape this signer produces, carrying only
+    claims it checks the same way PyJWT does, skip PyJWT entirely.
+    Anything else goes through jwt.decode. Decoded claims of recently
+    seen tokens are kept in an LRU; callers get their own copy.
+    """
+    def __init__(self, algorithm: str, signing_key, verifying_key, cache_size: int = 4096):
+        self.algorithm = algorithm
+        self.cache_size = cache_size
+        self.claims: OrderedDict[str, dict] = OrderedDict()
+
+        header = json.dumps({"alg": algorithm, "typ": "JWT"}, separators=(",", ":")).encode()
+        self.header = b64encode(header)
+
+        if algorithm in HMAC_DIGESTS:
+            key = signing_key.encode() if isinstance(signing_key, str) else signing_key
+            self.mac = hmac.new(key, digestmod=HMAC_DIGESTS[algorithm])
+            self.signing_key = self.verifying_key = key
+        else:
+            self.mac = None
+            self.signing_key = signing_key
+            self.verifying_key = verifying_key
+            self.jws_algorithm = jwt.get_algorithm_by_name(algorithm)
+
+
+    def encode(self, claims: dict) -> str:
+        claims = {
+            name: timegm(value.utctimetuple()) if isinstance(value, datetime) else value
+            for name, value in claims.items()
+        }
+        payload = b64encode(json.dumps(claims, separators=(",", ":")).encode())
+        signing_input = self.header + b"." + payload
+        if self.mac is not None:
+            mac = self.mac.copy()
+            mac.update(signing_input)
+            signature = mac.digest()
+        else:
+            signature = self.jws_algorithm.sign(signing_input, self.signing_key)
+        return (signing_input + b"." + b64encode(signature)).decode()
+
+
+    def decode(self, token: str) -> dict:
+        claims = self.claims.get(token)
+        if claims is None:
+            claims = self._verify(token)
+            self.claims[token] = claims
+            if len(self.claims) > self.cache_size:
+                self.claims.popitem(last=False)
+        else:
+            self.claims.move_to_end(token)
+
+        # a cached token still runs out; nbf and iat only ever get further in the past
+        exp = claims.get("exp")
+        if exp is not None and time.time() >= exp:
+            self.claims.pop(token, None)
+            raise jwt.ExpiredSignatureError("Signature has expired")
+        return dict(claims)
+
+
+    def _verify(self, token: str) -> dict:
+        if self.mac is None:
+            return jwt.decode(token, self.verifying_key, algorithms=[self.algorithm])
+
+        data = token.encode()
+        header, _, rest = data.partition(b".")
+        payload, _, signature = rest.partition(b".")
+        if header != self.header:
+            return jwt.decode(token, self.verifying_key, algorithms=[self.algorithm])
+
+        mac = self.mac.copy()
+        mac.update(header + b"." + payload)
+        try:
+            valid = hmac.compare_digest(mac.digest(), b64decode(signature))
+            claims = json.loads(b64decode(payload))
+        except (ValueError, TypeError) as e:
+            raise jwt.DecodeError("Invalid token") from e
+        if not valid:
+            raise jwt.InvalidSignatureError("Signature verification failed")
+        if not isinstance(claims, dict):
+            raise jwt.DecodeError("Invalid payload")
+        if not checked_here(claims):
+            return jwt.decode(token, self.verifying_key, algorithms=[self.algorithm])
+
+        now = time.time()
+        if "exp" in claims and now >= claims["exp"]:
+            raise jwt.ExpiredSignatureError("Signature has expired")
+        if "nbf" in claims and now < claims["nbf"]:
+            raise jwt.ImmatureSignatureError("The token is not yet valid (nbf)")
+        return claims
+
+
+class TokenEngine:
+    """
+    Access and refresh token signers built once from settings. With
+    JWT_ASYMMETRIC_ALGORITHM (EdDSA or ES256) access tokens are signed
+    with a private key, so other services can verify them with the public
+    key alone; refresh tokens stay on the shared secret.
+    """
+    def __init__(self, settings):
+        cache_size = settings.JWT_CLAIMS_CACHE_SIZE
+        if settings.JWT_ASYMMETRIC_ALGORITHM:
+            self.access = TokenSigner(
+                settings.JWT_ASYMMETRIC_ALGORITHM,
+                load_pem(settings.JWT_PRIVATE_KEY_PATH, private=True),
+                load_pem(settings.JWT_PUBLIC_KEY_PATH, private=False),
+                cache_size
+            )
+        else:
+            self.access = TokenSigner(settings.ALGORITHM, settings.SECRET_KEY, settings.SECRET_KEY, cache_size)
+        self.refresh = TokenSigner(
+            settings.ALGORITHM, settings.REFRESH_SECRET_KEY, settings.REFRESH_SECRET_KEY, cache_size
+        )